@@ -0,0 +1,476 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+benchmark.py: Benchmarks of all algorithms with JSON baselines.
+
+Usage:
+    benchmark.py -r results.json [size ...] [name ...]
+    benchmark.py -c baseline.json results.json [threshold]
+"""
+
+
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Callable
+import caesar_improved
+import functools
+import tracemalloc
+import statistics
+import datetime
+import platform
+import tempfile
+import hashlib
+import caesar
+import vigenere
+import random
+import ds_rsa
+import fnv1a
+import json
+import sdes
+import rsa
+import dsa
+import lsb
+import sys
+import os
+
+
+SIZES = (64, 1024, 16384)
+REPEAT = 20
+# fixed domain parameters, dsa chooses them randomly at import
+DSA_PARAMS = (997, 47857, 24118)
+
+
+def random_text(size: int) -> str:
+    """
+    random_text: generate printable text.
+
+    Args:
+        size (int): length of the text.
+
+    Returns:
+        str: random text.
+    """
+    return ''.join(random.choices('abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ\n', k=size))
+
+
+def bench_caesar(size: int) -> Callable[[], object]:
+    """
+    bench_caesar: caesar encryption and decryption of text.
+
+    Args:
+        size (int): length of the text.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    text = random_text(size)
+    return lambda: caesar.decrypt(caesar.encrypt(text))
+
+
+def bench_caesar_improved(size: int) -> Callable[[], object]:
+    """
+    bench_caesar_improved: improved caesar encryption and decryption of text.
+
+    Args:
+        size (int): length of the text.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    text = random_text(size)
+    ke, kd = caesar_improved.generate_keys()
+    return lambda: caesar_improved.decrypt(caesar_improved.encrypt(text, ke), kd)
+
+
+def bench_fnv1a(size: int) -> Callable[[], object]:
+    """
+    bench_fnv1a: FNV1A digest of text.
+
+    Args:
+        size (int): length of the text.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    text = random_text(size)
+    return lambda: fnv1a.FNV1AHash(text)
+
+
+def bench_sdes(size: int) -> Callable[[], object]:
+    """
+    bench_sdes: S-DES encryption of text.
+
+    Args:
+        size (int): length of the text.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    text = random_text(size)
+    K1, K2 = sdes.generate_keys(sdes.KEY)
+    return lambda: ''.join([sdes.encrypt(x, K1, K2) for x in text])
+
+
+def bench_rsa(size: int) -> Callable[[], object]:
+    """
+    bench_rsa: RSA encryption and decryption of text.
+
+    Args:
+        size (int): length of the text.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    text = random_text(size)
+    public_key, secret_key = rsa.generate_keys()
+    return lambda: rsa.decrypt(rsa.encrypt(text, public_key), secret_key)
+
+
+def bench_ds_rsa(size: int) -> Callable[[], object]:
+    """
+    bench_ds_rsa: RSA signature and its check.
+
+    Args:
+        size (int): length of the text.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    text = random_text(size)
+    public_key, secret_key = ds_rsa.generate_keys()
+    return lambda: ds_rsa.check_message_signature(*ds_rsa.sign_message(text, secret_key), public_key)
+
+
+def bench_dsa(size: int) -> Callable[[], object]:
+    """
+    bench_dsa: DSA signature and its check.
+
+    Args:
+        size (int): length of the text.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    text = random_text(size)
+    dsa.Q, dsa.P, dsa.G = DSA_PARAMS
+    secret_key, public_key = dsa.generate_keys()
+    return lambda: dsa.check_message_signature(*dsa.sign_message(text, secret_key), public_key)
+
+
+def bench_lsb(size: int) -> Callable[[], object]:
+    """
+    bench_lsb: in-place LSB writing and reading of text.
+
+    Args:
+        size (int): length of the text.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    text = random_text(size)
+    file = tempfile.NamedTemporaryFile(suffix='.bin')
+    file.write(os.urandom(size * 16))
+    file.flush()
+
+    def run() -> str:
+        msg_len_bits = lsb.write_hidden_message_inplace(file.name, text)
+        return lsb.read_hidden_message(file.name, msg_len_bits)
+
+    run.file = file
+    return run
+
+
+def bench_vigenere(size: int) -> Callable[[], object]:
+    """
+    bench_vigenere: in-place Vigenere encryption of bytes.
+
+    Args:
+        size (int): length of the buffer.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    buffer = bytearray(os.urandom(size))
+    return lambda: vigenere.encrypt_into(buffer, buffer, b'cryptography')
+
+
+def bench_memcpy(size: int) -> Callable[[], object]:
+    """
+    bench_memcpy: copy of bytes, upper bound for byte transforms.
+
+    Args:
+        size (int): length of the buffer.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    src, dst = os.urandom(size), bytearray(size)
+
+    def run() -> None:
+        dst[:] = src
+
+    return run
+
+
+def bench_rsa_parallel(size: int, workers: int) -> Callable[[], object]:
+    """
+    bench_rsa_parallel: RSA encryption and decryption of text on several cores.
+
+    Args:
+        size (int): length of the text.
+        workers (int): number of processes.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    text = random_text(size)
+    public_key, secret_key = rsa.generate_keys()
+    executor = ProcessPoolExecutor(workers)
+
+    def run() -> str:
+        encrypted = rsa.encrypt_parallel(text, public_key, workers, executor)
+        return rsa.decrypt_parallel(encrypted, secret_key, workers, executor)
+
+    run.executor = executor
+    return run
+
+
+def bench_ds_rsa_sign(size: int, bits: int, nprimes: int = None) -> Callable[[], object]:
+    """
+    bench_ds_rsa_sign: RSA signature with big modulus.
+
+    Args:
+        size (int): length of the text.
+        bits (int): bit length of modulus.
+        nprimes (int, optional): number of primes for CRT signature,
+                                 None for signature without CRT. Defaults to None.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    text = random_text(size)
+    _, secret_key = ds_rsa.generate_multiprime_keys(nprimes or 2, bits)
+
+    if nprimes is None:
+        secret_key = {'d': secret_key['d'], 'r': secret_key['r']}
+
+    return lambda: ds_rsa.sign_message(text, secret_key)
+
+
+@functools.lru_cache
+def dsa_batch_params(qbits: int = 160, pbits: int = 1024) -> tuple[int, int, int]:
+    """
+    dsa_batch_params: generate fixed DSA domain parameters long enough for batch check.
+
+    Args:
+        qbits (int, optional): bit length of Q. Defaults to 160.
+        pbits (int, optional): bit length of P. Defaults to 1024.
+
+    Returns:
+        tuple[int, int, int]: Q, P and G.
+    """
+    state = random.getstate()
+    random.seed(f'dsa_batch_params[{qbits}, {pbits}]')
+
+    try:
+        q = ds_rsa.generate_prime(qbits)
+        while True:
+            p = (random.getrandbits(pbits - qbits) | (1 << (pbits - qbits - 1))) * q + 1
+            if p.bit_length() == pbits and ds_rsa.is_probable_prime(p):
+                break
+        h = 2
+        while pow(h, (p - 1) // q, p) == 1:
+            h += 1
+    finally:
+        random.setstate(state)
+
+    return q, p, pow(h, (p - 1) // q, p)
+
+
+def bench_dsa_batch(size: int, batch: int, single: bool = False) -> Callable[[], object]:
+    """
+    bench_dsa_batch: batch check of DSA signatures with 160/1024-bit parameters
+                     (records/s is ops/s * batch).
+
+    Args:
+        size (int): length of the text of one record.
+        batch (int): number of records.
+        single (bool, optional): check every record separately with pow() for comparison. Defaults to False.
+
+    Returns:
+        Callable[[], object]: function to measure.
+    """
+    dsa.Q, dsa.P, dsa.G = dsa_batch_params()
+    secret_key, public_key = dsa.generate_keys()
+    records = [dsa.sign_message_full(random_text(size), secret_key) for _ in range(batch)]
+
+    if single:
+        return lambda: [
+            dsa.check_hash_signature_pow(int(hashlib.md5(m.encode('UTF-8')).hexdigest(), base=16), R % dsa.Q, s, public_key)
+            for m, R, s in records
+        ]
+
+    return lambda: dsa.check_batch_signatures(records, public_key)
+
+
+BENCHMARKS = {
+    'caesar': bench_caesar,
+    'caesar_improved': bench_caesar_improved,
+    'fnv1a': bench_fnv1a,
+    'sdes': bench_sdes,
+    'rsa': bench_rsa,
+    'ds_rsa': bench_ds_rsa,
+    'dsa': bench_dsa,
+    'lsb': bench_lsb,
+    'vigenere': bench_vigenere,
+    'memcpy': bench_memcpy,
+}
+
+for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+    BENCHMARKS[f'rsa_parallel_{workers}'] = functools.partial(bench_rsa_parallel, workers=workers)
+
+for bits in (1024, 2048):
+    BENCHMARKS[f'ds_rsa_sign_{bits}'] = functools.partial(bench_ds_rsa_sign, bits=bits)
+    for nprimes in (2, 3, 4):
+        BENCHMARKS[f'ds_rsa_sign_{bits}_{nprimes}p'] = functools.partial(bench_ds_rsa_sign, bits=bits, nprimes=nprimes)
+
+for batch in (16, 64, 256, 1024):
+    BENCHMARKS[f'dsa_batch_{batch}'] = functools.partial(bench_dsa_batch, batch=batch)
+    BENCHMARKS[f'dsa_single_{batch}'] = functools.partial(bench_dsa_batch, batch=batch, single=True)
+
+
+def percentile(values: list[float], p: float) -> float:
+    """
+    percentile: calculate percentile with linear interpolation.
+
+    Args:
+        values (list[float]): sorted values.
+        p (float): percentile from 0 to 100.
+
+    Returns:
+        float: percentile value.
+    """
+    k = (len(values) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(values) - 1)
+    return values[i] + (values[j] - values[i]) * (k - i)
+
+
+def measure(func: Callable[[], object], nbytes: int, repeat: int = REPEAT) -> dict[str, float]:
+    """
+    measure: run function several times and collect statistics.
+
+    Args:
+        func (Callable[[], object]): function to measure.
+        nbytes (int): bytes processed by one call.
+        repeat (int, optional): number of measured calls. Defaults to REPEAT.
+
+    Returns:
+        dict[str, float]: ops/s, MB/s, latency percentiles (ms) and peak memory (KiB).
+    """
+    func()
+
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        timings.append(perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    mean = statistics.fmean(timings)
+
+    return {
+        'ops_s': 1 / mean,
+        'mb_s': nbytes / mean / 1e6,
+        'p50_ms': percentile(timings, 50) * 1e3,
+        'p90_ms': percentile(timings, 90) * 1e3,
+        'p99_ms': percentile(timings, 99) * 1e3,
+        'peak_kib': peak / 1024,
+    }
+
+
+def run(sizes: tuple[int, ...] = SIZES, names: tuple[str, ...] = None, repeat: int = REPEAT) -> dict:
+    """
+    run: run benchmarks.
+
+    Args:
+        sizes (tuple[int, ...], optional): input sizes. Defaults to SIZES.
+        names (tuple[str, ...], optional): benchmarks to run. Defaults to all.
+        repeat (int, optional): number of measured calls. Defaults to REPEAT.
+
+    Returns:
+        dict: metadata and results keyed by 'name[size]'.
+    """
+    results = {}
+
+    for name in names or BENCHMARKS:
+        for size in sizes:
+            random.seed(f'{name}[{size}]')
+            func = BENCHMARKS[name](size)
+            results[f'{name}[{size}]'] = measure(func, size, repeat)
+            if hasattr(func, 'executor'):
+                func.executor.shutdown()
+            sys.stderr.write(f"{name}[{size}]: {results[f'{name}[{size}]']['ops_s']:.1f} ops/s\n")
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'dsa_params': DSA_PARAMS,
+            'dsa_batch_params': dsa_batch_params() if dsa_batch_params.cache_info().currsize else None,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list[str]:
+    """
+    compare: find benchmarks whose median latency became worse than baseline.
+
+    Args:
+        baseline (dict): baseline results.
+        current (dict): current results.
+        threshold (float, optional): allowed relative slowdown. Defaults to 0.1.
+
+    Returns:
+        list[str]: description of every regression.
+    """
+    regressions = []
+
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+
+        expected = baseline['results'][name]['p50_ms']
+        if result['p50_ms'] > expected * (1 + threshold):
+            change = (result['p50_ms'] - expected) / expected * 100
+            regressions.append(f"{name}: p50 {result['p50_ms']:.3f} ms vs {expected:.3f} ms ({change:+.1f}%)")
+
+    return regressions
+
+
+if __name__ == '__main__':
+    assert sys.argv[1] and sys.argv[2]
+
+    if sys.argv[1] == '-r':
+        sizes = tuple(int(x) for x in sys.argv[3:] if x.isdigit()) or SIZES
+        names = tuple(x for x in sys.argv[3:] if not x.isdigit()) or None
+        with open(sys.argv[2], 'w') as file:
+            json.dump(run(sizes, names), file, indent=4)
+    elif sys.argv[1] == '-c':
+        assert sys.argv[3]
+        threshold = float(sys.argv[4]) if len(sys.argv) > 4 else 0.1
+
+        with open(sys.argv[2]) as bfile, open(sys.argv[3]) as cfile:
+            regressions = compare(json.load(bfile), json.load(cfile), threshold)
+
+        for regression in regressions:
+            sys.stdout.write(f'{regression}\n')
+
+        sys.exit(1 if regressions else 0)
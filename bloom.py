@@ -0,0 +1,324 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bloom.py: Bloom filter on FNV1A hashes and replay index of signed messages.
+
+Double hashing: i-th bit of the item is (h1 + i * h2) mod m, where
+h1 = FNV1A(text) and h2 = FNV1A(text, h1) | 1 (FNV1A of the text repeated twice).
+
+Replay index keeps several generations of filters, the newest one receives
+items and the oldest one is cleared every window, so an item is remembered
+at least (generations - 1) * window seconds.
+
+Snapshot format (big-endian):
+    magic 'FNVB' | version (u16) | generations (u16) | hashes (u32) | bits (u64) |
+    window (f64) | epoch (i64) | generations bit arrays from the newest one
+"""
+
+
+from typing import Callable, Iterable
+from fnv1a import FNV1AHash
+import numpy as np
+import threading
+import ds_rsa
+import struct
+import math
+import mmap
+import time
+import sys
+import os
+
+
+MAGIC = b'FNVB'
+VERSION = 1
+HEADER = struct.Struct('>4sHHIQdq')
+
+
+def item_hashes(text: str) -> tuple[int, int]:
+    """
+    item_hashes: calculate two hashes of double hashing.
+
+    Args:
+        text (str): item.
+
+    Returns:
+        tuple[int, int]: h1 and odd h2.
+    """
+    h1 = FNV1AHash(text)
+    return h1, FNV1AHash(text, h1) | 1
+
+
+class BloomFilter:
+    """
+    BloomFilter: Bloom filter with bits in NumPy array.
+    """
+
+    def __init__(self, nbits: int, nhashes: int, bits: np.ndarray = None):
+        """
+        __init__: create empty filter or filter over existing bits.
+
+        Args:
+            nbits (int): number of bits, multiple of 8.
+            nhashes (int): number of hashes of the item.
+            bits (np.ndarray, optional): uint8 array of nbits / 8 bytes. Defaults to None.
+        """
+        assert nbits > 0 and nbits % 8 == 0 and nhashes > 0
+
+        self.nbits = nbits
+        self.nhashes = nhashes
+        self.bits = np.zeros(nbits // 8, dtype=np.uint8) if bits is None else bits
+        self.steps = np.arange(nhashes, dtype=np.uint64)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float = 0.001) -> 'BloomFilter':
+        """
+        for_capacity: create filter with optimal size for number of items.
+
+        Args:
+            capacity (int): expected number of items.
+            fp_rate (float, optional): false positive rate. Defaults to 0.001.
+
+        Returns:
+            BloomFilter: empty filter.
+        """
+        nbits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2 / 8) * 8
+        nhashes = max(1, round(nbits / capacity * math.log(2)))
+        return cls(nbits, nhashes)
+
+    def positions(self, texts: Iterable[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        positions: calculate bytes and masks of bits of the items.
+
+        Args:
+            texts (Iterable[str]): items.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: byte indices and bit masks, one row per item.
+        """
+        hashes = np.array([item_hashes(x) for x in texts], dtype=np.uint64).reshape(-1, 2)
+        indices = (hashes[:, :1] + hashes[:, 1:] * self.steps) % np.uint64(self.nbits)
+        return indices >> np.uint64(3), np.left_shift(1, indices & np.uint64(7)).astype(np.uint8)
+
+    def add_many(self, texts: Iterable[str]) -> None:
+        """
+        add_many: add items.
+
+        Args:
+            texts (Iterable[str]): items.
+        """
+        indices, masks = self.positions(texts)
+        np.bitwise_or.at(self.bits, indices, masks)
+
+    def contains_many(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        contains_many: check items (false positives are possible, false negatives are not).
+
+        Args:
+            texts (Iterable[str]): items.
+
+        Returns:
+            np.ndarray: bool array, True if item may be in the filter.
+        """
+        indices, masks = self.positions(texts)
+        return np.all(self.bits[indices] & masks, axis=1)
+
+    def add(self, text: str) -> None:
+        self.add_many([text])
+
+    def __contains__(self, text: str) -> bool:
+        return bool(self.contains_many([text])[0])
+
+    def clear(self) -> None:
+        """
+        clear: remove all items.
+        """
+        self.bits[:] = 0
+
+    def fill_ratio(self) -> float:
+        """
+        fill_ratio: part of set bits.
+
+        Returns:
+            float: from 0 to 1.
+        """
+        return int(np.unpackbits(self.bits).sum()) / self.nbits
+
+
+class ReplayIndex:
+    """
+    ReplayIndex: thread-safe index of recently seen messages with generations of Bloom filters.
+    """
+
+    def __init__(self, capacity: int, window: float, generations: int = 2, fp_rate: float = 0.001,
+                 clock: Callable[[], float] = time.time, filters: list[BloomFilter] = None, epoch: int = None):
+        """
+        __init__: create empty index.
+
+        Args:
+            capacity (int): expected number of items in one window.
+            window (float): lifetime of generation in seconds.
+            generations (int, optional): number of generations. Defaults to 2.
+            fp_rate (float, optional): false positive rate of one generation. Defaults to 0.001.
+            clock (Callable[[], float], optional): time source, must survive restarts
+                                                   for snapshots. Defaults to time.time.
+            filters (list[BloomFilter], optional): generations from the newest one. Defaults to None.
+            epoch (int, optional): number of the window of the newest generation. Defaults to None.
+        """
+        assert generations > 1 and window > 0
+
+        self.window = window
+        self.clock = clock
+        self.filters = filters or [BloomFilter.for_capacity(capacity, fp_rate) for _ in range(generations)]
+        self.epoch = int(clock() // window) if epoch is None else epoch
+        self.lock = threading.Lock()
+
+    def rotate(self) -> None:
+        """
+        rotate: clear generations of elapsed windows.
+        """
+        now = int(self.clock() // self.window)
+
+        for _ in range(min(now - self.epoch, len(self.filters))):
+            oldest = self.filters.pop()
+            oldest.clear()
+            self.filters.insert(0, oldest)
+
+        self.epoch = max(self.epoch, now)
+
+    def seen_many(self, texts: list[str]) -> np.ndarray:
+        """
+        seen_many: check items in all generations.
+
+        Args:
+            texts (list[str]): items.
+
+        Returns:
+            np.ndarray: bool array, True if item may be seen.
+        """
+        with self.lock:
+            self.rotate()
+            seen = np.zeros(len(texts), dtype=bool)
+            for bloom in self.filters:
+                seen |= bloom.contains_many(texts)
+            return seen
+
+    def check_and_add_many(self, texts: list[str]) -> np.ndarray:
+        """
+        check_and_add_many: check items and add them to the newest generation.
+
+        Args:
+            texts (list[str]): items.
+
+        Returns:
+            np.ndarray: bool array, True for replays (items seen before or earlier in texts).
+        """
+        with self.lock:
+            self.rotate()
+            seen = np.zeros(len(texts), dtype=bool)
+            for bloom in self.filters:
+                seen |= bloom.contains_many(texts)
+
+            first = {}
+            for i, text in enumerate(texts):
+                if first.setdefault(text, i) != i:
+                    seen[i] = True
+
+            self.filters[0].add_many([x for x, s in zip(texts, seen) if not s])
+            return seen
+
+    def check_and_add(self, text: str) -> bool:
+        """
+        check_and_add: check item and add it to the newest generation.
+
+        Args:
+            text (str): item.
+
+        Returns:
+            bool: True for replay.
+        """
+        return bool(self.check_and_add_many([text])[0])
+
+    def save(self, filename: str) -> None:
+        """
+        save: write snapshot atomically.
+
+        Args:
+            filename (str): filename of the snapshot.
+        """
+        with self.lock:
+            bloom = self.filters[0]
+            header = HEADER.pack(
+                MAGIC, VERSION, len(self.filters), bloom.nhashes, bloom.nbits, self.window, self.epoch,
+            )
+
+            with open(f'{filename}.tmp', 'wb') as file:
+                file.write(header)
+                for bloom in self.filters:
+                    file.write(memoryview(bloom.bits))
+
+        os.replace(f'{filename}.tmp', filename)
+
+    @classmethod
+    def load(cls, filename: str, clock: Callable[[], float] = time.time) -> 'ReplayIndex':
+        """
+        load: map snapshot copy-on-write, changes are not written back to the file.
+
+        Args:
+            filename (str): filename of the snapshot.
+            clock (Callable[[], float], optional): time source. Defaults to time.time.
+
+        Returns:
+            ReplayIndex: index with expired generations cleared.
+        """
+        with open(filename, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        magic, version, generations, nhashes, nbits, window, epoch = HEADER.unpack_from(data)
+
+        if magic != MAGIC or version != VERSION or len(data) != HEADER.size + generations * nbits // 8:
+            data.close()
+            raise ValueError(f'{filename} is not a replay index')
+
+        filters = [
+            BloomFilter(nbits, nhashes, np.frombuffer(data, np.uint8, nbits // 8, HEADER.size + i * nbits // 8))
+            for i in range(generations)
+        ]
+        index = cls(0, window, generations, clock=clock, filters=filters, epoch=epoch)
+        index.rotate()
+        return index
+
+
+def check_fresh_signature(index: ReplayIndex, message: str, signature: int, public_key: dict[str, int]) -> bool:
+    """
+    check_fresh_signature: reject replay before ds_rsa.check_message_signature.
+
+    Only messages with valid signatures are added to the index.
+
+    Args:
+        index (ReplayIndex): replay index.
+        message (str): source message.
+        signature (int): signature.
+        public_key (dict[str, int]): public key.
+
+    Returns:
+        bool: True if signature is valid and message is not a replay.
+    """
+    text = f'{signature}:{message}'
+
+    if index.seen_many([text])[0] or not ds_rsa.check_message_signature(message, signature, public_key):
+        return False
+
+    return not index.check_and_add(text)
+
+
+if __name__ == '__main__':
+    assert sys.argv[1] and sys.argv[2]
+
+    if sys.argv[1] == '-c':
+        assert sys.argv[3] and sys.argv[4]
+        ReplayIndex(int(sys.argv[3]), float(sys.argv[4])).save(sys.argv[2])
+    elif sys.argv[1] == '-a':
+        index = ReplayIndex.load(sys.argv[2])
+        for text, replay in zip(sys.argv[3:], index.check_and_add_many(sys.argv[3:])):
+            sys.stdout.write(f'{"replay" if replay else "new"} {text}\n')
+        index.save(sys.argv[2])
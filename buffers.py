@@ -0,0 +1,65 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+buffers.py: Byte substitution between buffer-protocol objects.
+
+Accepts bytes, bytearray, memoryview, mmap, array and C-contiguous NumPy arrays.
+"""
+
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+CHUNK = 1 << 16
+
+
+def transform_into(src, dst, table: bytes) -> int:
+    """
+    transform_into: write table[x] for every byte x of src into dst.
+
+    With NumPy the bytes are looked up by np.take straight into dst over chunks
+    of CHUNK bytes, through one index buffer allocated per call, so the loop does
+    not allocate. Without NumPy every chunk is passed through bytes.translate.
+    dst may be the same buffer as src (in place), otherwise they must not overlap.
+
+    Args:
+        src: readable buffer.
+        dst: writable buffer of at least the same size in bytes.
+        table (bytes): substitution table of 256 bytes.
+
+    Returns:
+        int: number of transformed bytes.
+    """
+    assert len(table) == 256
+
+    with memoryview(src) as sview, memoryview(dst) as dview:
+        with sview.cast('B') as source, dview.cast('B') as destination:
+            length = source.nbytes
+
+            if destination.readonly:
+                raise TypeError('destination buffer is read-only')
+            if destination.nbytes < length:
+                raise ValueError(f'destination buffer is too small: {destination.nbytes} < {length}')
+
+            if np is None:
+                for i in range(0, length, CHUNK):
+                    destination[i:i + CHUNK] = source[i:i + CHUNK].tobytes().translate(table)
+                return length
+
+            lookup = np.frombuffer(table, dtype=np.uint8)
+            sarray = np.frombuffer(source, dtype=np.uint8)
+            darray = np.frombuffer(destination, dtype=np.uint8)
+            # np.take needs intp indices, converting the whole buffer at once would allocate 8 bytes per byte
+            indices = np.empty(min(CHUNK, length), dtype=np.intp)
+
+            for i in range(0, length, CHUNK):
+                part = indices[:min(CHUNK, length - i)]
+                np.copyto(part, sarray[i:i + CHUNK])
+                np.take(lookup, part, out=darray[i:i + len(part)], mode='clip')
+
+            del sarray, darray
+
+    return length
@@ -8,6 +8,10 @@ Formulas:
 """
 
 
+from buffers import transform_into
+from functools import lru_cache
+
+
 def encrypt(text: str, k: int = 3, n: int = 256) -> str:
     """
     encrypt: Caesar encryption algorithm for ASCII codes.
@@ -22,6 +26,60 @@ def decrypt(text: str, k: int = 3, n: int = 256) -> str:
     return ''.join([chr((ord(x) + n - k) % n) for x in text])
 
 
+@lru_cache(maxsize=None)
+def generate_tables(k: int = 3, n: int = 256) -> tuple[bytes, bytes]:
+    """
+    generate_tables: precompute encryption and decryption of all bytes.
+
+    Args:
+        k (int, optional): shift. Defaults to 3.
+        n (int, optional): alphabet size, not more than 256. Defaults to 256.
+
+    Returns:
+        tuple[bytes, bytes]: encryption and decryption tables.
+    """
+    assert n <= 256
+    return bytes([(x + k) % n for x in range(256)]), bytes([(x + n - k) % n for x in range(256)])
+
+
+def encrypt_into(src, dst, k: int = 3, n: int = 256) -> int:
+    """
+    encrypt_into: Caesar encryption of buffer into buffer (may be the same one).
+
+    Args:
+        src: readable buffer.
+        dst: writable buffer.
+        k (int, optional): shift. Defaults to 3.
+        n (int, optional): alphabet size, not more than 256. Defaults to 256.
+
+    Returns:
+        int: number of encrypted bytes.
+    """
+    return transform_into(src, dst, generate_tables(k, n)[0])
+
+
+def decrypt_into(src, dst, k: int = 3, n: int = 256) -> int:
+    """
+    decrypt_into: Caesar decryption of buffer into buffer (may be the same one).
+
+    Args:
+        src: readable buffer.
+        dst: writable buffer.
+        k (int, optional): shift. Defaults to 3.
+        n (int, optional): alphabet size, not more than 256. Defaults to 256.
+
+    Returns:
+        int: number of decrypted bytes.
+    """
+    return transform_into(src, dst, generate_tables(k, n)[1])
+
+
 if __name__ == '__main__':
     assert encrypt('cryptography') == 'fu|swrjudsk|'
     assert decrypt('fu|swrjudsk|') == 'cryptography'
+
+    buffer = bytearray(b'cryptography')
+    encrypt_into(buffer, buffer)
+    assert buffer == b'fu|swrjudsk|'
+    decrypt_into(buffer, buffer)
+    assert buffer == b'cryptography'
@@ -13,6 +13,8 @@ Constraints:
 """
 
 
+from buffers import transform_into
+from functools import lru_cache
 from math import gcd
 
 
@@ -40,7 +42,61 @@ def decrypt(text: str, kd: int, n: int = 256) -> str:
     return ''.join([chr((ord(x) * kd) % n) for x in text])
 
 
+@lru_cache(maxsize=None)
+def generate_table(k: int, n: int = 256) -> bytes:
+    """
+    generate_table: precompute (i*k) mod n for all bytes.
+
+    Args:
+        k (int): ke for encryption or kd for decryption.
+        n (int, optional): alphabet size, not more than 256. Defaults to 256.
+
+    Returns:
+        bytes: table.
+    """
+    assert n <= 256
+    return bytes([(x * k) % n for x in range(256)])
+
+
+def encrypt_into(src, dst, ke: int, n: int = 256) -> int:
+    """
+    encrypt_into: Improved caesar encryption of buffer into buffer (may be the same one).
+
+    Args:
+        src: readable buffer.
+        dst: writable buffer.
+        ke (int): encryption key.
+        n (int, optional): alphabet size, not more than 256. Defaults to 256.
+
+    Returns:
+        int: number of encrypted bytes.
+    """
+    return transform_into(src, dst, generate_table(ke, n))
+
+
+def decrypt_into(src, dst, kd: int, n: int = 256) -> int:
+    """
+    decrypt_into: Improved caesar decryption of buffer into buffer (may be the same one).
+
+    Args:
+        src: readable buffer.
+        dst: writable buffer.
+        kd (int): decryption key.
+        n (int, optional): alphabet size, not more than 256. Defaults to 256.
+
+    Returns:
+        int: number of decrypted bytes.
+    """
+    return transform_into(src, dst, generate_table(kd, n))
+
+
 if __name__ == '__main__':
     ke, kd = generate_keys(256)
     assert encrypt('cryptography', ke) == ')VkP\\M5V#P8k'
     assert decrypt(')VkP\\M5V#P8k', kd) == 'cryptography'
+
+    buffer = bytearray(len('cryptography'))
+    encrypt_into(b'cryptography', buffer, ke)
+    assert buffer == b')VkP\\M5V#P8k'
+    decrypt_into(buffer, buffer, kd)
+    assert buffer == b'cryptography'
@@ -0,0 +1,445 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cli.py: Non-interactive command line for all algorithms.
+
+Inputs are read from paths or stdin ('-') and processed in chunks, outputs are
+written to a path, to a directory (one file per input) or to stdout ('-').
+Keys of rsa, ds_rsa and dsa are loaded from files written by 'keygen' or from
+a keyring as 'keyring#id'.
+
+Examples:
+    cli.py keygen rsa pub.key sec.key
+    cli.py rsa encrypt -k pub.key a.txt b.txt -o encrypted/
+    cli.py rsa seal -k pub.key big.bin > big.env
+    cat a.txt | cli.py ds_rsa sign -k sec.key > a.signed
+    cli.py dsa check -k pub.key *.signed
+"""
+
+
+from typing import Callable, Iterator, TextIO
+from contextlib import contextmanager
+import caesar_improved
+import argparse
+import envelope
+import hashlib
+import keyring
+import caesar
+import ds_rsa
+import sdes
+import ast
+import rsa
+import dsa
+import lsb
+import sys
+import os
+
+
+CHUNK = 1 << 16
+
+
+def load_key(filename: str) -> dict:
+    """
+    load_key: load key written by 'keygen' or key from keyring as 'keyring#id'.
+
+    Args:
+        filename (str): filename of the key.
+
+    Returns:
+        dict: key.
+    """
+    if '#' in filename:
+        filename, kid = filename.rsplit('#', 1)
+        with keyring.Keyring(filename) as keys:
+            return keys.get(kid).to_dict()
+
+    with open(filename) as file:
+        key = ast.literal_eval(file.read())
+
+    assert isinstance(key, dict), f'{filename} is not a key file'
+    return key
+
+
+def save_key(filename: str, key: dict) -> None:
+    """
+    save_key: save key in the format of load_key.
+
+    Args:
+        filename (str): filename of the key.
+        key (dict): key.
+    """
+    with open(filename, 'w') as file:
+        file.write(f'{key}\n')
+
+
+def use_dsa_key(key: dict) -> int:
+    """
+    use_dsa_key: set DSA domain parameters of the key.
+
+    Args:
+        key (dict): DSA key with q, p and g.
+
+    Returns:
+        int: secret or public key.
+    """
+    dsa.Q, dsa.P, dsa.G = key['q'], key['p'], key['g']
+    return key['key']
+
+
+def read_chunks(file: TextIO, size: int = CHUNK) -> Iterator[str]:
+    """
+    read_chunks: read file by chunks.
+
+    Args:
+        file (TextIO): source file.
+        size (int, optional): size of the chunk. Defaults to CHUNK.
+
+    Yields:
+        Iterator[str]: chunks of the file.
+    """
+    chunk = file.read(size)
+
+    while chunk:
+        yield chunk
+        chunk = file.read(size)
+
+
+def split_trailer(chunks: Iterator[str], newlines: int, consume: Callable[[str], None]) -> str:
+    """
+    split_trailer: pass chunks to consume except the trailer of the stream.
+
+    The trailer is the part of the stream starting with its last newlines.
+
+    Args:
+        chunks (Iterator[str]): chunks of the stream.
+        newlines (int): number of newlines in the trailer.
+        consume (Callable[[str], None]): consumer of the message part.
+
+    Returns:
+        str: trailer.
+    """
+    pending = ''
+
+    for chunk in chunks:
+        pending += chunk
+        start = len(pending)
+
+        # the trailer can not start before its first newline, the earliest
+        # candidate is the newlines-th newline from the end or the first one
+        for _ in range(newlines):
+            i = pending.rfind('\n', 0, start)
+            if i == -1:
+                break
+            start = i
+
+        if start > 0:
+            consume(pending[:start])
+            pending = pending[start:]
+
+    return pending
+
+
+def char_transform(func: Callable[[str], str]) -> Callable[[str], str]:
+    """
+    char_transform: make chunk transform from symbol transform with cache of results.
+
+    Args:
+        func (Callable[[str], str]): transform of one symbol.
+
+    Returns:
+        Callable[[str], str]: transform of the chunk.
+    """
+    cache = {}
+
+    def transform(chunk: str) -> str:
+        for x in set(chunk).difference(cache):
+            cache[x] = func(x)
+        return ''.join([cache[x] for x in chunk])
+
+    return transform
+
+
+def make_transform(args: argparse.Namespace) -> Callable[[str], str]:
+    """
+    make_transform: make chunk transform of symmetric and rsa algorithms.
+
+    Args:
+        args (argparse.Namespace): parsed arguments.
+
+    Returns:
+        Callable[[str], str]: transform of the chunk.
+    """
+    encrypt = args.action == 'encrypt'
+
+    if args.algorithm == 'caesar':
+        k = int(args.key or 3)
+        return (lambda x: caesar.encrypt(x, k)) if encrypt else (lambda x: caesar.decrypt(x, k))
+    elif args.algorithm == 'caesar_improved':
+        ke = int(args.key) if args.key else caesar_improved.generate_keys()[0]
+        kd = pow(ke, -1, 256)
+        return (lambda x: caesar_improved.encrypt(x, ke)) if encrypt else (lambda x: caesar_improved.decrypt(x, kd))
+    elif args.algorithm == 'sdes':
+        K1, K2 = sdes.generate_keys(int(args.key or sdes.KEY))
+        func = sdes.encrypt if encrypt else sdes.decrypt
+        return char_transform(lambda x: func(x, K1, K2))
+    elif args.algorithm == 'rsa':
+        key = load_key(args.key)
+        func = rsa.encrypt if encrypt else rsa.decrypt
+        return char_transform(lambda x: func(x, key))
+
+
+def transform_stream(src: TextIO, dst: TextIO, transform: Callable[[str], str]) -> None:
+    """
+    transform_stream: write transformed chunks of src to dst.
+
+    Args:
+        src (TextIO): source stream.
+        dst (TextIO): destination stream.
+        transform (Callable[[str], str]): transform of the chunk.
+    """
+    for chunk in read_chunks(src):
+        dst.write(transform(chunk))
+
+
+def sign_stream(src: TextIO, dst: TextIO, args: argparse.Namespace) -> None:
+    """
+    sign_stream: copy src to dst and append signature in the format of sign_file.
+
+    Args:
+        src (TextIO): source stream.
+        dst (TextIO): destination stream.
+        args (argparse.Namespace): parsed arguments.
+    """
+    key = load_key(args.key)
+
+    if args.algorithm == 'ds_rsa':
+        digest = ds_rsa.FNV1AHash('')
+        for chunk in read_chunks(src):
+            dst.write(chunk)
+            digest = ds_rsa.FNV1AHash(chunk, digest)
+        dst.write(f'\n{ds_rsa.encrypt(digest, key)}')
+    else:
+        secret_key = use_dsa_key(key)
+        md5 = hashlib.md5()
+        for chunk in read_chunks(src):
+            dst.write(chunk)
+            md5.update(chunk.encode('UTF-8'))
+        r, s = dsa.sign_hash(int(md5.hexdigest(), base=16), secret_key)
+        dst.write(f'\n r={r}\n s={s}\n')
+
+
+def check_stream(src: TextIO, args: argparse.Namespace) -> bool:
+    """
+    check_stream: check signature appended by sign_stream or sign_file.
+
+    Args:
+        src (TextIO): signed stream.
+        args (argparse.Namespace): parsed arguments.
+
+    Returns:
+        bool: True or False.
+    """
+    key = load_key(args.key)
+
+    if args.algorithm == 'ds_rsa':
+        digest = [ds_rsa.FNV1AHash('')]
+
+        def consume(chunk: str) -> None:
+            digest[0] = ds_rsa.FNV1AHash(chunk, digest[0])
+
+        trailer = split_trailer(read_chunks(src), 1, consume)
+        if not trailer.startswith('\n') or not trailer[1:].isdigit():
+            return False
+        return ds_rsa.decrypt(int(trailer), key) == digest[0]
+    else:
+        public_key = use_dsa_key(key)
+        md5 = hashlib.md5()
+        trailer = split_trailer(read_chunks(src), 3, lambda x: md5.update(x.encode('UTF-8')))
+        lines = trailer.split('\n')
+        if len(lines) != 4 or not lines[1][3:].isdigit() or not lines[2][3:].isdigit():
+            return False
+        r, s = int(lines[1][3:]), int(lines[2][3:])
+        return dsa.check_hash_signature(int(md5.hexdigest(), base=16), r, s, public_key)
+
+
+@contextmanager
+def open_input(filename: str, binary: bool = False) -> Iterator[TextIO]:
+    """
+    open_input: open file or stdin for reading.
+
+    Args:
+        filename (str): filename or '-'.
+        binary (bool, optional): open in binary mode. Defaults to False.
+    """
+    if filename == '-':
+        yield sys.stdin.buffer if binary else sys.stdin
+    elif binary:
+        with open(filename, 'rb') as file:
+            yield file
+    else:
+        with open(filename, newline='') as file:
+            yield file
+
+
+@contextmanager
+def open_output(filename: str, output: str, many: bool, binary: bool = False) -> Iterator[TextIO]:
+    """
+    open_output: open destination of the input file.
+
+    Args:
+        filename (str): filename of the input.
+        output (str): destination path, directory or '-'.
+        many (bool): True if there are several inputs.
+        binary (bool, optional): open in binary mode. Defaults to False.
+    """
+    if output is None or output == '-':
+        yield sys.stdout.buffer if binary else sys.stdout
+        return
+
+    if many or os.path.isdir(output):
+        os.makedirs(output, exist_ok=True)
+        output = os.path.join(output, os.path.basename(filename))
+
+    with open(output, 'wb' if binary else 'w', **({} if binary else {'newline': ''})) as file:
+        yield file
+
+
+def keygen(args: argparse.Namespace) -> None:
+    """
+    keygen: generate key pair and save it to files.
+
+    Args:
+        args (argparse.Namespace): parsed arguments.
+    """
+    if args.algorithm == 'rsa':
+        public_key, secret_key = rsa.generate_keys(args.fast)
+    elif args.algorithm == 'ds_rsa' and args.primes:
+        public_key, secret_key = ds_rsa.generate_multiprime_keys(args.primes, args.bits)
+    elif args.algorithm == 'ds_rsa':
+        public_key, secret_key = ds_rsa.generate_keys(args.fast)
+    else:
+        secret_key, public_key = dsa.generate_keys()
+        params = {'q': dsa.Q, 'p': dsa.P, 'g': dsa.G}
+        public_key, secret_key = {'key': public_key, **params}, {'key': secret_key, **params}
+
+    save_key(args.public, public_key)
+    save_key(args.secret, secret_key)
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    run: process all inputs.
+
+    Args:
+        args (argparse.Namespace): parsed arguments.
+    """
+    inputs = args.inputs or ['-']
+    many = len(inputs) > 1
+
+    if args.algorithm == 'lsb':
+        for filename in inputs:
+            if args.action == 'hide':
+                dfilename = args.output
+                if many or os.path.isdir(dfilename):
+                    os.makedirs(dfilename, exist_ok=True)
+                    dfilename = os.path.join(dfilename, os.path.basename(filename))
+                msg_len_bits = lsb.copy_hidden_message(filename, dfilename, args.message, args.bits)
+                sys.stdout.write(f'{msg_len_bits}\n')
+            else:
+                message = lsb.read_hidden_message(filename, args.length, args.bits)
+                sys.stdout.write(f'{filename}: {message}\n' if many else f'{message}\n')
+        return
+
+    if args.action in ('encrypt', 'decrypt'):
+        transform = make_transform(args)
+
+    if args.action in ('seal', 'unseal'):
+        key = load_key(args.key)
+        for filename in inputs:
+            with open_input(filename, True) as src, open_output(filename, args.output, many, True) as dst:
+                (envelope.seal if args.action == 'seal' else envelope.unseal)(src, dst, key)
+        return
+
+    for filename in inputs:
+        with open_input(filename) as src:
+            if args.action == 'check':
+                result = check_stream(src, args)
+                sys.stdout.write(f'{filename}: {result}\n' if many else f'{result}\n')
+                continue
+
+            with open_output(filename, args.output, many) as dst:
+                if args.action == 'sign':
+                    sign_stream(src, dst, args)
+                else:
+                    transform_stream(src, dst, transform)
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    """
+    parse_args: parse command line.
+
+    Args:
+        argv (list[str], optional): arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    algorithms = parser.add_subparsers(dest='algorithm', required=True)
+    subparsers = {}
+
+    gen = subparsers['keygen'] = algorithms.add_parser('keygen', help='generate key pair')
+    gen.add_argument('algorithm', choices=('rsa', 'ds_rsa', 'dsa'))
+    gen.add_argument('public', help='file for public key')
+    gen.add_argument('secret', help='file for secret key')
+    gen.add_argument('--primes', type=int, help='number of primes of ds_rsa modulus')
+    gen.add_argument('--bits', type=int, default=2048, help='bit length of ds_rsa modulus with --primes')
+    gen.add_argument('--fast', action='store_true', help='bounded-time key setup of rsa and ds_rsa')
+    gen.set_defaults(command=keygen)
+
+    actions = {
+        'caesar': ('encrypt', 'decrypt'),
+        'caesar_improved': ('encrypt', 'decrypt'),
+        'sdes': ('encrypt', 'decrypt'),
+        'rsa': ('encrypt', 'decrypt', 'seal', 'unseal'),
+        'ds_rsa': ('sign', 'check'),
+        'dsa': ('sign', 'check'),
+        'lsb': ('hide', 'reveal'),
+    }
+
+    for algorithm, choices in actions.items():
+        sub = subparsers[algorithm] = algorithms.add_parser(algorithm)
+        sub.add_argument('action', choices=choices)
+        sub.add_argument('inputs', nargs='*', help="input files, '-' or nothing for stdin")
+        sub.add_argument('-k', '--key', help='key number or key file')
+        sub.add_argument('-o', '--output', help="output file or directory, '-' for stdout")
+        sub.set_defaults(command=run)
+
+        if algorithm == 'lsb':
+            sub.add_argument('-m', '--message', help='message to hide')
+            sub.add_argument('-n', '--length', type=int, help='length of the hidden message in bits')
+            sub.add_argument('-b', '--bits', type=int, default=1, help='changed bits per byte')
+
+    argv = sys.argv[1:] if argv is None else argv
+
+    # parse_intermixed_args does not support subparsers, so it is called on the chosen one
+    if argv and argv[0] in subparsers:
+        args = subparsers[argv[0]].parse_intermixed_args(argv[1:], argparse.Namespace(algorithm=argv[0]))
+    else:
+        args = parser.parse_args(argv)
+
+    if args.algorithm in ('rsa', 'ds_rsa', 'dsa') and args.command is run and not args.key:
+        parser.error(f'{args.algorithm} requires --key')
+    if args.algorithm == 'lsb' and args.action == 'hide' and (args.message is None or not args.output):
+        parser.error('lsb hide requires --message and --output')
+    if args.algorithm == 'lsb' and args.action == 'reveal' and args.length is None:
+        parser.error('lsb reveal requires --length')
+    if args.algorithm == 'lsb' and '-' in (args.inputs or ['-']):
+        parser.error('lsb requires carrier files')
+
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    args.command(args)
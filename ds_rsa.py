@@ -6,6 +6,8 @@ ds_rsa.py: Digistal signature based on RSA algorithm.
 
 
 from math import gcd as gcd
+from functools import lru_cache
+from bisect import bisect_left
 from ctypes import c_uint32
 from primePy import primes
 from egcd import egcd
@@ -15,6 +17,8 @@ import sys
 
 PRIMES = [x for x in range(0xFFFFFFF, 0xFFFFFFF + 1000) if primes.check(x)]
 
+SMALL_E = (65537, 257, 17, 5, 3)
+
 
 def fast_exp(val: int, exp: int, mod: int) -> int:
     """
@@ -83,13 +87,84 @@ def choose_e(primes: list[int], x: int) -> int:
     return e
 
 
-def generate_keys() -> tuple[dict, dict]:
+@lru_cache(maxsize=16)
+def close_prime_pairs(primes: tuple[int, ...], epsilon: int) -> list[tuple[int, int]]:
+    """
+    close_prime_pairs: find all pairs of different primes closer than epsilon by index.
+
+    Args:
+        primes (tuple[int, ...]): primes.
+        epsilon (int): max difference between two prime numbers.
+
+    Returns:
+        list[tuple[int, int]]: pairs of primes.
+    """
+    primes = sorted(set(primes))
+    return [
+        (primes[i], primes[j])
+        for i in range(len(primes))
+        for j in range(i + 1, bisect_left(primes, primes[i] + epsilon))
+    ]
+
+
+def choose_close_primes(primes: list[int], epsilon: int = 10) -> tuple[int, int]:
+    """
+    choose_close_primes: choose two prime numbers in bounded time, without retries.
+
+    Args:
+        primes (list[int]): list of primes.
+        epsilon (int, optional): max difference between two prime numbers. Defaults to 10.
+
+    Returns:
+        tuple[int, int]: two prime numbers.
+    """
+    pairs = close_prime_pairs(tuple(primes), epsilon)
+
+    if not pairs:
+        raise ValueError(f'no primes closer than {epsilon}')
+
+    return random.choice(pairs)
+
+
+def choose_small_e(x: int) -> int:
+    """
+    choose_small_e: choose standard small e, otherwise the smallest odd e coprime with x.
+
+    Args:
+        x (int): x value.
+
+    Returns:
+        int: chosen e.
+    """
+    for e in SMALL_E:
+        if e < x and gcd(e, x) == 1:
+            return e
+
+    e = 3
+    while gcd(e, x) != 1:
+        e += 2
+
+    return e
+
+
+def generate_keys(fast: bool = False) -> tuple[dict, dict]:
     """
     generate_keys: generate public and secret keys.
 
+    Args:
+        fast (bool, optional): use bounded-time choose_close_primes and choose_small_e
+                               instead of random retries. Defaults to False.
+
     Returns:
         tuple[dict, dict]: pair public key and secret key.
     """
+    if fast:
+        p, q = choose_close_primes(PRIMES)
+        x = (p - 1) * (q - 1)
+        e = choose_small_e(x)
+        d = pow(e, -1, x)
+        return {'e': e, 'r': p * q}, {'d': d, 'r': p * q}
+
     p, q = choose_random_primes(PRIMES)
     r = p * q
 
@@ -107,6 +182,124 @@ def generate_keys() -> tuple[dict, dict]:
     return public_key, secret_key
 
 
+def is_probable_prime(number: int, rounds: int = 32) -> bool:
+    """
+    is_probable_prime: Miller-Rabin primality test.
+
+    Args:
+        number (int): number to test.
+        rounds (int, optional): number of random bases. Defaults to 32.
+
+    Returns:
+        bool: True if number is prime with probability at least 1 - 4 ** -rounds.
+    """
+    if number < 4:
+        return number in (2, 3)
+
+    if number % 2 == 0:
+        return False
+
+    s, t = 0, number - 1
+    while t % 2 == 0:
+        s, t = s + 1, t // 2
+
+    for _ in range(rounds):
+        x = pow(random.randrange(2, number - 1), t, number)
+        if x in (1, number - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % number
+            if x == number - 1:
+                break
+        else:
+            return False
+
+    return True
+
+
+def generate_prime(bits: int) -> int:
+    """
+    generate_prime: generate random prime of the given bit length.
+
+    Args:
+        bits (int): bit length.
+
+    Returns:
+        int: prime.
+    """
+    while True:
+        number = random.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if is_probable_prime(number):
+            return number
+
+
+def generate_multiprime_keys(nprimes: int = 3, bits: int = 1024) -> tuple[dict, dict]:
+    """
+    generate_multiprime_keys: generate public and secret keys with modulus of several primes.
+
+    Secret key also holds primes, exponents d mod (p - 1) and CRT coefficients,
+    public key has the same format as keys of generate_keys.
+
+    Args:
+        nprimes (int, optional): number of primes. Defaults to 3.
+        bits (int, optional): bit length of modulus. Defaults to 1024.
+
+    Returns:
+        tuple[dict, dict]: pair public key and secret key.
+    """
+    assert nprimes >= 2 and bits >= 16 * nprimes
+
+    while True:
+        sizes = [bits // nprimes + (i < bits % nprimes) for i in range(nprimes)]
+        primes = [generate_prime(x) for x in sizes]
+        r = 1
+        for p in primes:
+            r *= p
+        if r.bit_length() == bits and len(set(primes)) == nprimes:
+            break
+
+    x = 1
+    for p in primes:
+        x *= p - 1
+
+    e = choose_small_e(x)
+    d = pow(e, -1, x)
+
+    coeffs, prod = [1], primes[0]
+    for p in primes[1:]:
+        coeffs.append(pow(prod, -1, p))
+        prod *= p
+
+    public_key = {'e': e, 'r': r}
+    secret_key = {'d': d, 'r': r, 'primes': primes, 'exps': [d % (p - 1) for p in primes], 'coeffs': coeffs}
+
+    return public_key, secret_key
+
+
+def crt_exp(val: int, secret_key: dict) -> int:
+    """
+    crt_exp: calculate val ** d mod r by exponentiations modulo every prime
+             and Garner's recombination.
+
+    Args:
+        val (int): val to exp.
+        secret_key (dict): secret key of generate_multiprime_keys.
+
+    Returns:
+        int: calculated number.
+    """
+    primes, exps, coeffs = secret_key['primes'], secret_key['exps'], secret_key['coeffs']
+
+    result, prod = fast_exp(val % primes[0], exps[0], primes[0]), primes[0]
+
+    for p, dp, coeff in zip(primes[1:], exps[1:], coeffs[1:]):
+        m = fast_exp(val % p, dp, p)
+        result += (m - result) * coeff % p * prod
+        prod *= p
+
+    return result
+
+
 def encrypt(mhash: int, secret_key: dict[str, int]) -> int:
     """
     encrypt: encrypt hash of the message and create signature.
@@ -118,6 +311,9 @@ def encrypt(mhash: int, secret_key: dict[str, int]) -> int:
     Returns:
         int: signature.
     """
+    if 'primes' in secret_key:
+        return crt_exp(mhash, secret_key)
+
     signature = fast_exp(mhash, secret_key['d'], secret_key['r'])
     return signature
 
@@ -137,20 +333,19 @@ def decrypt(signature: int, public_key: dict[str, int]) -> int:
     return mhash
 
 
-def FNV1AHash(text: str) -> int:
+def FNV1AHash(text: str, digest: int = 0x811C9DC5) -> int:
     """
     FNV1AHash: calculate hash according to FNV1A algorithm.
 
     Args:
         text (str): source text.
+        digest (int, optional): digest of the preceding text to continue with.
+                                Defaults to FNV offset basis.
 
     Returns:
         int: hash digest.
     """
     FNV_prime = 0x1000193
-    FNV_offset_basic = 0x811C9DC5
-
-    digest = FNV_offset_basic
 
     for item in text:
         byte_of_data = ord(item)
@@ -230,6 +425,10 @@ if __name__ == '__main__':
     if sys.argv[1] == '-g' and sys.argv[2] == 'keys':
         public_key, secret_key = generate_keys()
         sys.stdout.write(f'pub: {public_key}\nsec: {secret_key}\n')
+    elif sys.argv[1] == '-g' and sys.argv[2] == 'mpkeys':
+        assert sys.argv[3] and sys.argv[4]
+        public_key, secret_key = generate_multiprime_keys(int(sys.argv[3]), int(sys.argv[4]))
+        sys.stdout.write(f'pub: {public_key}\nsec: {secret_key}\n')
     elif sys.argv[1] == '-s':
         assert sys.argv[3]
         sign_file(sys.argv[2], eval(sys.argv[3]))
@@ -5,6 +5,8 @@ dsa.py: Digistal signature with DSA algorithm.
 """
 
 
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from primePy import primes
 import hashlib
 import random
@@ -65,11 +67,68 @@ def generate_keys() -> tuple[int, int]:
     Returns:
         tuple[int, int]: secret and public keys.
     """
-    secret_key = random.choice(range(1, Q))
-    public_key = G ** secret_key % P
+    secret_key = random.randrange(1, Q)
+    public_key = pow(G, secret_key, P)
     return secret_key, public_key
 
 
+def sign_hash_full(mhash: int, secret_key: int) -> tuple[int, int]:
+    """
+    sign_hash_full: sign hash of the message and keep full commitment R = G^k mod P
+                    instead of r = R mod Q.
+
+    Args:
+        mhash (int): hash of the message.
+        secret_key (int): secret key.
+
+    Returns:
+        tuple[int, int]: R and s.
+    """
+    k = random.randrange(1, Q)
+    R = pow(G, k, P)
+    s = pow(k, -1, Q) * (mhash + secret_key * (R % Q)) % Q
+
+    if s == 0 or R % Q == 0:
+        R, s = sign_retry(mhash, secret_key)
+
+    return R, s
+
+
+def sign_retry(mhash: int, secret_key: int) -> tuple[int, int]:
+    """
+    sign_retry: choose new k until r and s are not 0.
+
+    Args:
+        mhash (int): hash of the message.
+        secret_key (int): secret key.
+
+    Returns:
+        tuple[int, int]: R and s.
+    """
+    while True:
+        k = random.randrange(1, Q)
+        R = pow(G, k, P)
+        s = pow(k, -1, Q) * (mhash + secret_key * (R % Q)) % Q
+
+        if s != 0 and R % Q != 0:
+            return R, s
+
+
+def sign_hash(mhash: int, secret_key: int) -> tuple[int, int]:
+    """
+    sign_hash: sign hash of the message with secret key.
+
+    Args:
+        mhash (int): hash of the message.
+        secret_key (int): secret key.
+
+    Returns:
+        tuple[int, int]: r and s.
+    """
+    R, s = sign_hash_full(mhash, secret_key)
+    return R % Q, s
+
+
 def sign_message(message: str, secret_key: int) -> tuple[str, int, int]:
     """
     sign_message: sign message with secret key.
@@ -82,24 +141,16 @@ def sign_message(message: str, secret_key: int) -> tuple[str, int, int]:
         tuple[str, int, int]: source message, r and s.
     """
     mhash = int(hashlib.md5(message.encode('UTF-8')).hexdigest(), base=16)
-    k = random.choice(range(1, Q))
-    r = (G ** k % P) % Q
-    s = k ** (Q - 1 - 1) * (mhash + secret_key * r) % Q
-
-    while s == 0 or r == 0:
-        k = random.choice(range(1, Q))
-        r = (G ** k % P) % Q
-        s = k ** (Q - 1 - 1) * (mhash + secret_key * r) % Q
-
+    r, s = sign_hash(mhash, secret_key)
     return message, r, s
 
 
-def check_message_signature(message: str, r: int, s: int, public_key: int) -> bool:
+def check_hash_signature(mhash: int, r: int, s: int, public_key: int) -> bool:
     """
-    check_message_signature: check signature.
+    check_hash_signature: check signature of the hash of the message.
 
     Args:
-        message (str): source message.
+        mhash (int): hash of the message.
         r (int): r.
         s (int): s.
         public_key (int): public key.
@@ -107,7 +158,6 @@ def check_message_signature(message: str, r: int, s: int, public_key: int) -> bo
     Returns:
         bool: True or False.
     """
-    mhash = int(hashlib.md5(message.encode('UTF-8')).hexdigest(), base=16)
     w = s ** (Q - 1 - 1) % Q
     u1 = (mhash * w) % Q
     u2 = (r * w) % Q
@@ -115,6 +165,207 @@ def check_message_signature(message: str, r: int, s: int, public_key: int) -> bo
     return v == r
 
 
+def check_message_signature(message: str, r: int, s: int, public_key: int) -> bool:
+    """
+    check_message_signature: check signature.
+
+    Args:
+        message (str): source message.
+        r (int): r.
+        s (int): s.
+        public_key (int): public key.
+
+    Returns:
+        bool: True or False.
+    """
+    mhash = int(hashlib.md5(message.encode('UTF-8')).hexdigest(), base=16)
+    return check_hash_signature(mhash, r, s, public_key)
+
+
+def sign_message_full(message: str, secret_key: int) -> tuple[str, int, int]:
+    """
+    sign_message_full: sign message for batch verification.
+
+    DSA signature (r, s) can not be batch verified because r = R mod Q loses
+    the group element, so the full commitment R is returned instead of r.
+
+    Args:
+        message (str): source message.
+        secret_key (int): secret key.
+
+    Returns:
+        tuple[str, int, int]: source message, R and s.
+    """
+    mhash = int(hashlib.md5(message.encode('UTF-8')).hexdigest(), base=16)
+    R, s = sign_hash_full(mhash, secret_key)
+    return message, R, s
+
+
+def check_hash_signature_pow(mhash: int, r: int, s: int, public_key: int) -> bool:
+    """
+    check_hash_signature_pow: check_hash_signature with pow(), without huge intermediate numbers.
+
+    Args:
+        mhash (int): hash of the message.
+        r (int): r.
+        s (int): s.
+        public_key (int): public key.
+
+    Returns:
+        bool: True or False.
+    """
+    if not (0 < r < Q and 0 < s < Q):
+        return False
+
+    w = pow(s, Q - 2, Q)
+    return pow(G, mhash * w % Q, P) * pow(public_key, r * w % Q, P) % P % Q == r
+
+
+def multi_exp(bases: list[int], exponents: list[int], modulus: int) -> int:
+    """
+    multi_exp: calculate prod(bases[i] ^ exponents[i]) mod modulus by Straus method,
+               squarings are shared by all bases.
+
+    Args:
+        bases (list[int]): bases.
+        exponents (list[int]): exponents.
+        modulus (int): modulus.
+
+    Returns:
+        int: product.
+    """
+    result = 1
+
+    for bit in range(max(exponents, default=0).bit_length() - 1, -1, -1):
+        result = result * result % modulus
+        for base, exponent in zip(bases, exponents):
+            if exponent >> bit & 1:
+                result = result * base % modulus
+
+    return result
+
+
+def batch_holds(records: list[tuple[int, int, int]], public_key: int, bits: int) -> bool:
+    """
+    batch_holds: check prod(R_i ^ d_i) == G ^ sum(d_i * w_i * h_i) * y ^ sum(d_i * w_i * r_i) mod P
+                 with random exponents d_i of bits length.
+
+    Args:
+        records (list[tuple[int, int, int]]): hashes, R (of subgroup of order Q) and s.
+        public_key (int): public key.
+        bits (int): length of d_i, not more than length of Q.
+
+    Returns:
+        bool: True if all signatures are valid (error probability is about 2 ^ -bits).
+    """
+    ds = [random.randrange(1, 1 << bits) for _ in records]
+    a, b = 0, 0
+
+    for (mhash, R, s), d in zip(records, ds):
+        t = d * pow(s, Q - 2, Q)
+        a += t * mhash
+        b += t * (R % Q)
+
+    lhs = multi_exp([R for _, R, _ in records], ds, P)
+    return lhs == pow(G, a % Q, P) * pow(public_key, b % Q, P) % P
+
+
+def check_batch_signatures(records: list[tuple[str, int, int]], public_key: int, bits: int = 64) -> list[int]:
+    """
+    check_batch_signatures: check signatures of sign_message_full together.
+
+    Failed batches are split in halves until the bad signatures are found.
+    One batch check gives at most log2(Q) bits of security, so when Q is
+    shorter than bits (as the Q of this module) several rounds would be
+    slower than separate checks, and records are checked one by one.
+
+    Args:
+        records (list[tuple[str, int, int]]): messages, R and s.
+        public_key (int): public key.
+        bits (int, optional): security of one batch check in bits. Defaults to 64.
+
+    Returns:
+        list[int]: indices of records with bad signatures.
+    """
+    batched = (Q - 1).bit_length() > bits
+    bad, items = [], []
+
+    for i, (message, R, s) in enumerate(records):
+        mhash = int(hashlib.md5(message.encode('UTF-8')).hexdigest(), base=16)
+
+        if not (0 < R < P and 0 < s < Q and R % Q != 0):
+            bad.append(i)
+        elif not batched:
+            w = pow(s, Q - 2, Q)
+            if pow(G, mhash * w % Q, P) * pow(public_key, R % Q * w % Q, P) % P != R:
+                bad.append(i)
+        # R must belong to the subgroup of order Q, otherwise the batch equation can be cheated
+        elif pow(R, Q, P) != 1:
+            bad.append(i)
+        else:
+            items.append((i, (mhash, R, s)))
+
+    def split(items: list[tuple[int, tuple[int, int, int]]]) -> None:
+        if not items or batch_holds([x for _, x in items], public_key, bits):
+            return
+        if len(items) == 1:
+            bad.append(items[0][0])
+            return
+        split(items[:len(items) // 2])
+        split(items[len(items) // 2:])
+
+    split(items)
+
+    return sorted(bad)
+
+
+def check_batch_with_params(records: list[tuple[str, int, int]], public_key: int, params: tuple[int, int, int],
+                            bits: int = 64) -> list[int]:
+    """
+    check_batch_with_params: check_batch_signatures with domain parameters, for worker processes.
+
+    Args:
+        records (list[tuple[str, int, int]]): messages, R and s.
+        public_key (int): public key.
+        params (tuple[int, int, int]): Q, P and G.
+        bits (int, optional): security of one batch check in bits. Defaults to 64.
+
+    Returns:
+        list[int]: indices of records with bad signatures.
+    """
+    global Q, P, G
+    Q, P, G = params
+    return check_batch_signatures(records, public_key, bits)
+
+
+def check_batch_parallel(records: list[tuple[str, int, int]], public_key: int, batch_size: int = 256,
+                         workers: int = None, bits: int = 64) -> list[int]:
+    """
+    check_batch_parallel: check batches of signatures on several cores.
+
+    Args:
+        records (list[tuple[str, int, int]]): messages, R and s.
+        public_key (int): public key.
+        batch_size (int, optional): number of records in one batch. Defaults to 256.
+        workers (int, optional): number of processes. Defaults to number of cores.
+        bits (int, optional): security of one batch check in bits. Defaults to 64.
+
+    Returns:
+        list[int]: indices of records with bad signatures.
+    """
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    bad = []
+
+    with ProcessPoolExecutor(workers) as executor:
+        results = executor.map(
+            check_batch_with_params, batches, repeat(public_key), repeat((Q, P, G)), repeat(bits),
+        )
+        for start, indices in zip(range(0, len(records), batch_size), results):
+            bad.extend(start + i for i in indices)
+
+    return bad
+
+
 def sign_file(filename: str, secret_key: int) -> None:
     """
     sign_file: sign file.
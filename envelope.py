@@ -0,0 +1,153 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+envelope.py: Hybrid encryption with RSA-wrapped S-DES session key.
+
+Only the 10-bit S-DES session key is encrypted with RSA, the payload is
+encrypted with S-DES byte tables in chunks.
+
+Container format (big-endian):
+    magic 'RSAE' | version (u8) | wrapped key length (u16) | wrapped key | payload
+"""
+
+
+from typing import BinaryIO, Iterator
+import secrets
+import struct
+import sdes
+import ast
+import rsa
+import sys
+
+
+MAGIC = b'RSAE'
+VERSION = 1
+HEADER = struct.Struct('>4sBH')
+CHUNK = 1 << 16
+
+
+def wrap_key(session_key: int, public_key: dict[str, int]) -> bytes:
+    """
+    wrap_key: encrypt session key with RSA public key.
+
+    Args:
+        session_key (int): 10-bit S-DES key.
+        public_key (dict[str, int]): public key.
+
+    Returns:
+        bytes: wrapped key.
+    """
+    assert session_key < public_key['r'], 'modulus is too small for session key'
+
+    wrapped = ord(rsa.encrypt(chr(session_key), public_key))
+    return wrapped.to_bytes((public_key['r'].bit_length() + 7) // 8, 'big')
+
+
+def unwrap_key(wrapped: bytes, secret_key: dict[str, int]) -> int:
+    """
+    unwrap_key: decrypt session key with RSA secret key.
+
+    Args:
+        wrapped (bytes): wrapped key.
+        secret_key (dict[str, int]): secret key.
+
+    Returns:
+        int: 10-bit S-DES key.
+    """
+    return ord(rsa.decrypt(chr(int.from_bytes(wrapped, 'big')), secret_key))
+
+
+def read_chunks(src: BinaryIO) -> Iterator[memoryview]:
+    """
+    read_chunks: read stream into one reused buffer.
+
+    Args:
+        src (BinaryIO): source stream.
+
+    Yields:
+        Iterator[memoryview]: chunks, valid until the next one is read.
+    """
+    buffer = bytearray(CHUNK)
+    view = memoryview(buffer)
+
+    length = src.readinto(buffer)
+    while length:
+        yield view[:length]
+        length = src.readinto(buffer)
+
+
+def seal(src: BinaryIO, dst: BinaryIO, public_key: dict[str, int]) -> None:
+    """
+    seal: encrypt stream into envelope.
+
+    Args:
+        src (BinaryIO): source stream.
+        dst (BinaryIO): destination stream.
+        public_key (dict[str, int]): public key.
+    """
+    session_key = secrets.randbelow(1 << 10)
+    wrapped = wrap_key(session_key, public_key)
+    K1, K2 = sdes.generate_keys(session_key)
+
+    dst.write(HEADER.pack(MAGIC, VERSION, len(wrapped)) + wrapped)
+
+    for chunk in read_chunks(src):
+        sdes.encrypt_into(chunk, chunk, K1, K2)
+        dst.write(chunk)
+
+
+def unseal(src: BinaryIO, dst: BinaryIO, secret_key: dict[str, int]) -> None:
+    """
+    unseal: decrypt envelope stream.
+
+    Args:
+        src (BinaryIO): envelope stream.
+        dst (BinaryIO): destination stream.
+        secret_key (dict[str, int]): secret key.
+    """
+    magic, version, length = HEADER.unpack(src.read(HEADER.size))
+
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not an envelope')
+
+    session_key = unwrap_key(src.read(length), secret_key)
+    K1, K2 = sdes.generate_keys(session_key)
+
+    for chunk in read_chunks(src):
+        sdes.decrypt_into(chunk, chunk, K1, K2)
+        dst.write(chunk)
+
+
+def seal_file(filename: str, efilename: str, public_key: dict[str, int]) -> None:
+    """
+    seal_file: encrypt file into envelope file.
+
+    Args:
+        filename (str): filename of source file.
+        efilename (str): filename of envelope file.
+        public_key (dict[str, int]): public key.
+    """
+    with open(filename, 'rb') as file, open(efilename, 'wb') as efile:
+        seal(file, efile, public_key)
+
+
+def unseal_file(efilename: str, filename: str, secret_key: dict[str, int]) -> None:
+    """
+    unseal_file: decrypt envelope file.
+
+    Args:
+        efilename (str): filename of envelope file.
+        filename (str): filename of destination file.
+        secret_key (dict[str, int]): secret key.
+    """
+    with open(efilename, 'rb') as efile, open(filename, 'wb') as file:
+        unseal(efile, file, secret_key)
+
+
+if __name__ == '__main__':
+    assert sys.argv[1] and sys.argv[2] and sys.argv[3] and sys.argv[4]
+
+    if sys.argv[1] == '-e':
+        seal_file(sys.argv[2], sys.argv[3], ast.literal_eval(sys.argv[4]))
+    elif sys.argv[1] == '-d':
+        unseal_file(sys.argv[2], sys.argv[3], ast.literal_eval(sys.argv[4]))
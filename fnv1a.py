@@ -9,20 +9,19 @@ from ctypes import c_uint32
 import sys
 
 
-def FNV1AHash(text: str) -> int:
+def FNV1AHash(text: str, digest: int = 0x811C9DC5) -> int:
     """
     FNV1AHash: calculate hash according to FNV1A algorithm.
 
     Args:
         text (str): source text.
+        digest (int, optional): digest of the preceding text to continue with.
+                                Defaults to FNV offset basis.
 
     Returns:
         int: hash digest.
     """
     FNV_prime = 0x1000193
-    FNV_offset_basic = 0x811C9DC5
-
-    digest = FNV_offset_basic
 
     for item in text:
         byte_of_data = ord(item)
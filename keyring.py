@@ -0,0 +1,309 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+keyring.py: Binary keyring of rsa, ds_rsa and dsa keys.
+
+File format (big-endian):
+    header:  magic 'CKRG' | version (u16) | reserved (u16) | count (u32) | index offset (u64)
+    records: kind (u8) | number of ints (u8) | ints, each is length (u16) | bytes,
+             a list of ints is stored as its length followed by the ints
+    index:   count entries of key id (8 bytes) | record offset (u64) | record length (u32),
+             sorted by key id
+
+Key id is the beginning of SHA-256 of the record. The file is memory-mapped and
+a key is found by binary search in the index, so only that record is decoded.
+"""
+
+
+from typing import Iterator
+import hashlib
+import struct
+import mmap
+import ast
+import sys
+import os
+
+
+MAGIC = b'CKRG'
+VERSION = 1
+HEADER = struct.Struct('>4sHHIQ')
+ENTRY = struct.Struct('>8sQI')
+RECORD = struct.Struct('>BB')
+INT = struct.Struct('>H')
+
+KINDS = ('rsa-public', 'rsa-secret', 'ds_rsa-public', 'ds_rsa-secret', 'dsa-public', 'dsa-secret', 'ds_rsa-mp-secret')
+FIELDS = {
+    'rsa-public': ('e', 'r'),
+    'rsa-secret': ('d', 'r'),
+    'ds_rsa-public': ('e', 'r'),
+    'ds_rsa-secret': ('d', 'r'),
+    'dsa-public': ('key', 'q', 'p', 'g'),
+    'dsa-secret': ('key', 'q', 'p', 'g'),
+    'ds_rsa-mp-secret': ('d', 'r', 'primes', 'exps', 'coeffs'),
+}
+LISTS = frozenset(('primes', 'exps', 'coeffs'))
+
+
+def encode_key(kind: str, key: dict[str, int | list[int]]) -> bytes:
+    """
+    encode_key: encode key record.
+
+    Args:
+        kind (str): kind of the key from KINDS.
+        key (dict[str, int | list[int]]): key.
+
+    Returns:
+        bytes: record.
+    """
+    if set(key) - set(FIELDS[kind]):
+        raise ValueError(f'{kind} key can not hold {", ".join(sorted(set(key) - set(FIELDS[kind])))}')
+
+    ints = []
+    for name in FIELDS[kind]:
+        ints.extend([len(key[name]), *key[name]] if name in LISTS else [key[name]])
+
+    if len(ints) > 255:
+        raise ValueError(f'{kind} key has too many numbers')
+
+    data = [RECORD.pack(KINDS.index(kind), len(ints))]
+
+    for number in ints:
+        raw = number.to_bytes(max((number.bit_length() + 7) // 8, 1), 'big')
+        data.append(INT.pack(len(raw)) + raw)
+
+    return b''.join(data)
+
+
+def key_id(record: bytes) -> bytes:
+    """
+    key_id: calculate id of the key record.
+
+    Args:
+        record (bytes): record.
+
+    Returns:
+        bytes: 8-byte id.
+    """
+    return hashlib.sha256(record).digest()[:8]
+
+
+class Key:
+    """
+    Key: key record decoded on first access.
+    """
+
+    __slots__ = ('key_id', 'kind', '_record', '_ints')
+
+    def __init__(self, key_id: bytes, record: bytes):
+        """
+        __init__: create key from its record.
+
+        Args:
+            key_id (bytes): id of the key.
+            record (bytes): record.
+        """
+        self.key_id = key_id
+        self.kind = KINDS[record[0]]
+        self._record = record
+        self._ints = None
+
+    @property
+    def ints(self) -> tuple[int, ...]:
+        """
+        ints: numbers of the key.
+
+        Returns:
+            tuple[int, ...]: numbers in the order of FIELDS, lists are preceded by their lengths.
+        """
+        if self._ints is None:
+            ints, i = [], RECORD.size
+            for _ in range(self._record[1]):
+                length, = INT.unpack_from(self._record, i)
+                ints.append(int.from_bytes(self._record[i + INT.size:i + INT.size + length], 'big'))
+                i += INT.size + length
+            self._ints = tuple(ints)
+            self._record = None
+
+        return self._ints
+
+    def __getitem__(self, name: str) -> int | list[int]:
+        return self.to_dict()[name]
+
+    def to_dict(self) -> dict[str, int | list[int]]:
+        """
+        to_dict: key in the format of rsa, ds_rsa and cli.
+
+        Returns:
+            dict[str, int | list[int]]: key.
+        """
+        ints, key = iter(self.ints), {}
+
+        for name in FIELDS[self.kind]:
+            key[name] = [next(ints) for _ in range(next(ints))] if name in LISTS else next(ints)
+
+        return key
+
+    def __repr__(self) -> str:
+        return f'Key({self.key_id.hex()}, {self.kind})'
+
+
+def write_keyring(filename: str, keys: list[tuple[str, dict[str, int]]]) -> list[bytes]:
+    """
+    write_keyring: write keys to the keyring file.
+
+    Args:
+        filename (str): filename of the keyring.
+        keys (list[tuple[str, dict[str, int]]]): kinds and keys.
+
+    Returns:
+        list[bytes]: ids of the keys in the order of keys.
+    """
+    entries, ids, records = {}, [], []
+    offset = HEADER.size
+
+    for kind, key in keys:
+        record = encode_key(kind, key)
+        ids.append(key_id(record))
+
+        if ids[-1] not in entries:
+            entries[ids[-1]] = (offset, len(record))
+            records.append(record)
+            offset += len(record)
+
+    # the old keyring is replaced only when the new one is complete
+    with open(f'{filename}.tmp', 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(entries), offset))
+        file.writelines(records)
+        for kid in sorted(entries):
+            file.write(ENTRY.pack(kid, *entries[kid]))
+
+    os.replace(f'{filename}.tmp', filename)
+
+    return ids
+
+
+class Keyring:
+    """
+    Keyring: memory-mapped keyring file.
+    """
+
+    def __init__(self, filename: str):
+        """
+        __init__: open keyring file.
+
+        Args:
+            filename (str): filename of the keyring.
+        """
+        with open(filename, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, self.count, self.index = HEADER.unpack_from(self.data)
+
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError(f'{filename} is not a keyring')
+
+    def __enter__(self) -> 'Keyring':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, kid: bytes | str) -> bool:
+        return self.find(kid) is not None
+
+    def close(self) -> None:
+        """
+        close: unmap keyring file.
+        """
+        self.data.close()
+
+    def entry(self, i: int) -> tuple[bytes, int, int]:
+        """
+        entry: read index entry.
+
+        Args:
+            i (int): position in the index.
+
+        Returns:
+            tuple[bytes, int, int]: key id, record offset and record length.
+        """
+        return ENTRY.unpack_from(self.data, self.index + i * ENTRY.size)
+
+    def find(self, kid: bytes | str) -> int | None:
+        """
+        find: binary search of the key id in the index.
+
+        Args:
+            kid (bytes | str): key id as bytes or hex string.
+
+        Returns:
+            int | None: position in the index or None.
+        """
+        kid = bytes.fromhex(kid) if isinstance(kid, str) else kid
+        lo, hi = 0, self.count
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self.index + mid * ENTRY.size
+            current = self.data[start:start + len(kid)]
+            if current < kid:
+                lo = mid + 1
+            elif current > kid:
+                hi = mid
+            else:
+                return mid
+
+        return None
+
+    def get(self, kid: bytes | str) -> Key:
+        """
+        get: find key by id.
+
+        Args:
+            kid (bytes | str): key id as bytes or hex string.
+
+        Returns:
+            Key: key.
+        """
+        i = self.find(kid)
+
+        if i is None:
+            raise KeyError(kid)
+
+        kid, offset, length = self.entry(i)
+        return Key(kid, self.data[offset:offset + length])
+
+    def ids(self) -> Iterator[bytes]:
+        """
+        ids: iterate key ids in sorted order.
+
+        Yields:
+            Iterator[bytes]: key ids.
+        """
+        for i in range(self.count):
+            yield self.entry(i)[0]
+
+
+if __name__ == '__main__':
+    assert sys.argv[1] and sys.argv[2]
+
+    if sys.argv[1] == '-c':
+        keys = []
+        for arg in sys.argv[3:]:
+            kind, filename = arg.split(':', 1)
+            with open(filename) as file:
+                keys.append((kind, ast.literal_eval(file.read())))
+        for kid in write_keyring(sys.argv[2], keys):
+            sys.stdout.write(f'{kid.hex()}\n')
+    elif sys.argv[1] == '-l':
+        with Keyring(sys.argv[2]) as keyring:
+            for kid in keyring.ids():
+                sys.stdout.write(f'{kid.hex()} {keyring.get(kid).kind}\n')
+    elif sys.argv[1] == '-g':
+        assert sys.argv[3]
+        with Keyring(sys.argv[2]) as keyring:
+            sys.stdout.write(f'{keyring.get(sys.argv[3]).to_dict()}\n')
@@ -5,7 +5,82 @@ lsb.py: Least significant bit algorithm.
 """
 
 
+from math import ceil
+import shutil
+import mmap
 import sys
+import os
+
+
+def embed_bits(buffer: bytearray, offset: int, msg_bits: str, bits: int = 1) -> int:
+    """
+    embed_bits: replace least significant bits of the buffer bytes with message bits.
+
+    Args:
+        buffer (bytearray): writable buffer (bytearray, mmap, memoryview).
+        offset (int): index of the first byte to change.
+        msg_bits (str): message bits.
+        bits (int, optional): how much bits will be changed. Defaults to 1.
+
+    Returns:
+        int: index of the byte after the last changed one.
+    """
+    for i in range(0, len(msg_bits), bits):
+        chunk = msg_bits[i:i + bits]
+        buffer[offset] = (buffer[offset] >> bits << len(chunk)) | int(chunk, base=2)
+        offset += 1
+
+    return offset
+
+
+def extract_bits(buffer: bytes, offset: int, msg_len_bits: int, bits: int = 1) -> str:
+    """
+    extract_bits: read least significant bits of the buffer bytes.
+
+    Args:
+        buffer (bytes): readable buffer (bytes, mmap, memoryview).
+        offset (int): index of the first byte to read.
+        msg_len_bits (int): length of the hidden message.
+        bits (int, optional): how much bits will be read. Defaults to 1.
+
+    Returns:
+        str: hidden bits.
+    """
+    result = []
+    remaining = msg_len_bits
+
+    for byte in buffer[offset:offset + ceil(msg_len_bits / bits)]:
+        quantity = min(bits, remaining)
+        result.append(f'{byte & ((1 << quantity) - 1):0{quantity}b}')
+        remaining -= quantity
+
+    return ''.join(result)
+
+
+def message_to_bits(message: str) -> str:
+    """
+    message_to_bits: transform message to string of bits.
+
+    Args:
+        message (str): source message.
+
+    Returns:
+        str: bits of the message.
+    """
+    return ''.join([f'{ord(x):08b}' for x in message])
+
+
+def bits_to_message(msg_bits: str) -> str:
+    """
+    bits_to_message: transform string of bits to message.
+
+    Args:
+        msg_bits (str): bits of the message.
+
+    Returns:
+        str: message.
+    """
+    return ''.join([chr(int(msg_bits[i:i + 8], base=2)) for i in range(0, len(msg_bits), 8)])
 
 
 def write_hidden_message(filename: str, message: str, bits: int = 1) -> int:
@@ -23,17 +98,10 @@ def write_hidden_message(filename: str, message: str, bits: int = 1) -> int:
     with open(filename, 'rb') as file:
         pixels = bytearray(file.read())
         mid = len(pixels) // 2
-        msg_bits = ''.join([f'{ord(x):08b}' for x in message])
+        msg_bits = message_to_bits(message)
         msg_len_bits = len(msg_bits)
 
-        while msg_bits:
-            byte = pixels[mid]
-            bits_of_byte = f'{byte:b}'
-            bits_of_byte = bits_of_byte[:-bits] + msg_bits[:bits]
-            byte = int(bits_of_byte, base=2)
-            pixels[mid] = byte
-            msg_bits = msg_bits[bits:]
-            mid += 1
+        embed_bits(pixels, mid, msg_bits, bits)
 
         dfilename = input('Destination filename: ')
 
@@ -43,6 +111,58 @@ def write_hidden_message(filename: str, message: str, bits: int = 1) -> int:
         return msg_len_bits
 
 
+def write_hidden_message_inplace(filename: str, message: str, bits: int = 1) -> int:
+    """
+    write_hidden_message_inplace: write hidden message in the image without copying it.
+
+    The file is memory-mapped and only the pages holding the changed bytes are
+    touched, so I/O scales with the message size rather than the file size.
+
+    Args:
+        filename (str): filename of the file.
+        message (str): source message.
+        bits (int, optional): how much bits will be changed. Defaults to 1.
+
+    Returns:
+        int: length of the message.
+    """
+    msg_bits = message_to_bits(message)
+
+    with open(filename, 'r+b') as file:
+        size = os.fstat(file.fileno()).st_size
+
+        if size // 2 + ceil(len(msg_bits) / bits) > size:
+            raise ValueError(f'message is too long: {len(msg_bits)} bits, capacity {(size - size // 2) * bits} bits')
+        if not msg_bits:
+            return 0
+
+        with mmap.mmap(file.fileno(), 0) as pixels:
+            embed_bits(pixels, size // 2, msg_bits, bits)
+            pixels.flush()
+
+    return len(msg_bits)
+
+
+def copy_hidden_message(filename: str, dfilename: str, message: str, bits: int = 1) -> int:
+    """
+    copy_hidden_message: copy the image and write hidden message in the copy.
+
+    The copy is done by the kernel (copy_file_range/sendfile where available),
+    then the copy is patched in place.
+
+    Args:
+        filename (str): filename of the source file.
+        dfilename (str): filename of the destination file.
+        message (str): source message.
+        bits (int, optional): how much bits will be changed. Defaults to 1.
+
+    Returns:
+        int: length of the message.
+    """
+    shutil.copyfile(filename, dfilename)
+    return write_hidden_message_inplace(dfilename, message, bits)
+
+
 def read_hidden_message(filename: str, msg_len_bits: int, bits: int = 1) -> str:
     """
     read_hidden_message: read hidden message from the image.
@@ -56,23 +176,15 @@ def read_hidden_message(filename: str, msg_len_bits: int, bits: int = 1) -> str:
         str: hidden message.
     """
     with open(filename, 'rb') as file:
-        pixels = file.read()
-        mid = len(pixels) // 2
-
-        i, result = 0, ''
-        while i < msg_len_bits:
-            byte = pixels[mid]
-            bits_of_byte = f'{byte:b}'
-            result += bits_of_byte[-1]
-            i += 1
-            mid += 1
+        # empty files can not be memory-mapped
+        if os.fstat(file.fileno()).st_size == 0:
+            return bits_to_message(extract_bits(b'', 0, msg_len_bits, bits))
 
-        L = []
-        while result:
-            L.append(chr(int(result[:8], base=2)))
-            result = result[8:]
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as pixels:
+            mid = len(pixels) // 2
+            result = extract_bits(pixels, mid, msg_len_bits, bits)
 
-        return ''.join(L)
+            return bits_to_message(result)
 
 
 if __name__ == '__main__':
@@ -81,6 +193,13 @@ if __name__ == '__main__':
     if sys.argv[1] == '-w':
         msg_len_bits = write_hidden_message(sys.argv[2], sys.argv[3])
         sys.stdout.write(f'{msg_len_bits}\n')
+    elif sys.argv[1] == '-wi':
+        msg_len_bits = write_hidden_message_inplace(sys.argv[2], sys.argv[3])
+        sys.stdout.write(f'{msg_len_bits}\n')
+    elif sys.argv[1] == '-wc':
+        assert sys.argv[4]
+        msg_len_bits = copy_hidden_message(sys.argv[2], sys.argv[3], sys.argv[4])
+        sys.stdout.write(f'{msg_len_bits}\n')
     elif sys.argv[1] == '-r':
         hidden_message = read_hidden_message(sys.argv[2], int(sys.argv[3]))
         sys.stdout.write(f'{hidden_message}\n')
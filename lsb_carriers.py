@@ -0,0 +1,351 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+lsb_carriers.py: Least significant bit algorithm over BMP, PPM and PCM WAV carriers.
+
+Every stripe starts with a header written in the same bits as the payload:
+    magic (4 bytes) | message id (4) | message length (4) | stripe index (2) |
+    stripe count (2) | stripe length (4)
+"""
+
+
+from concurrent.futures import ProcessPoolExecutor
+from lsb import embed_bits, extract_bits
+from math import ceil
+import struct
+import random
+import json
+import mmap
+import sys
+import os
+
+
+MAGIC = b'LSBS'
+HEADER = struct.Struct('>4sIIHHI')
+
+
+def parse_bmp(header: bytes, size: int) -> tuple[int, int, int]:
+    """
+    parse_bmp: find pixel data of uncompressed 24/32-bit BMP.
+
+    Args:
+        header (bytes): first bytes of the file.
+        size (int): size of the file.
+
+    Returns:
+        tuple[int, int, int]: offset, length and stride of the sample data.
+    """
+    offset, = struct.unpack_from('<I', header, 10)
+    width, height, _, bpp, compression = struct.unpack_from('<iiHHI', header, 18)
+
+    if bpp not in (24, 32) or compression not in (0, 3):
+        raise ValueError(f'unsupported BMP: {bpp} bpp, compression {compression}')
+
+    length = (bpp * width + 31) // 32 * 4 * abs(height)
+    return offset, min(length, size - offset), 1
+
+
+def parse_ppm(header: bytes, size: int) -> tuple[int, int, int]:
+    """
+    parse_ppm: find pixel data of binary (P6) PPM.
+
+    Args:
+        header (bytes): first bytes of the file.
+        size (int): size of the file.
+
+    Returns:
+        tuple[int, int, int]: offset, length and stride of the sample data.
+    """
+    fields, i = [], 2
+
+    while len(fields) < 3:
+        if header[i:i + 1] == b'#':
+            i = header.index(b'\n', i) + 1
+        elif header[i:i + 1].isspace():
+            i += 1
+        else:
+            j = i
+            while header[j:j + 1].isdigit():
+                j += 1
+            if j == i:
+                raise ValueError('malformed PPM header')
+            fields.append(int(header[i:j]))
+            i = j
+
+    width, height, maxval = fields
+
+    if maxval > 255:
+        raise ValueError('unsupported PPM: 16-bit samples')
+
+    offset = i + 1
+    return offset, min(width * height * 3, size - offset), 1
+
+
+def parse_wav(header: bytes, size: int) -> tuple[int, int, int]:
+    """
+    parse_wav: find sample data of 8/16-bit PCM WAV.
+
+    Only the low byte of every 16-bit sample is used.
+
+    Args:
+        header (bytes): first bytes of the file.
+        size (int): size of the file.
+
+    Returns:
+        tuple[int, int, int]: offset, length and stride of the sample data.
+    """
+    i, stride = 12, None
+
+    while i + 8 <= len(header):
+        chunk_id, chunk_size = struct.unpack_from('<4sI', header, i)
+
+        if chunk_id == b'fmt ':
+            audio_format, _, _, _, _, sample_bits = struct.unpack_from('<HHIIHH', header, i + 8)
+            if audio_format not in (1, 0xFFFE) or sample_bits not in (8, 16):
+                raise ValueError(f'unsupported WAV: format {audio_format}, {sample_bits} bits')
+            stride = sample_bits // 8
+        elif chunk_id == b'data':
+            if stride is None:
+                raise ValueError('WAV data chunk before fmt chunk')
+            return i + 8, min(chunk_size, size - i - 8), stride
+
+        i += 8 + chunk_size + chunk_size % 2
+
+    raise ValueError('WAV data chunk not found')
+
+
+def parse_carrier(filename: str) -> tuple[int, int, int]:
+    """
+    parse_carrier: find sample data region of the carrier.
+
+    Args:
+        filename (str): filename of the carrier.
+
+    Returns:
+        tuple[int, int, int]: offset, length and stride of the sample data.
+    """
+    with open(filename, 'rb') as file:
+        header = file.read(1 << 16)
+        size = os.fstat(file.fileno()).st_size
+
+    if header[:2] == b'BM':
+        return parse_bmp(header, size)
+    elif header[:2] == b'P6':
+        return parse_ppm(header, size)
+    elif header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return parse_wav(header, size)
+
+    raise ValueError(f'unsupported carrier: {filename}')
+
+
+def capacity(length: int, stride: int, bits: int = 1) -> int:
+    """
+    capacity: how much payload bytes fit into the sample data region.
+
+    Args:
+        length (int): length of the sample data.
+        stride (int): distance between used bytes.
+        bits (int, optional): how much bits will be changed. Defaults to 1.
+
+    Returns:
+        int: capacity in bytes without stripe header.
+    """
+    return max(ceil(length / stride) * bits // 8 - HEADER.size, 0)
+
+
+def build_capacity_index(directory: str, bits: int = 1) -> list[dict]:
+    """
+    build_capacity_index: find all supported carriers of the directory.
+
+    Args:
+        directory (str): directory with carriers.
+        bits (int, optional): how much bits will be changed. Defaults to 1.
+
+    Returns:
+        list[dict]: carriers sorted by filename.
+    """
+    index = []
+
+    for name in sorted(os.listdir(directory)):
+        filename = os.path.join(directory, name)
+
+        if not os.path.isfile(filename):
+            continue
+
+        try:
+            offset, length, stride = parse_carrier(filename)
+        except (ValueError, struct.error):
+            continue
+
+        index.append({
+            'filename': filename,
+            'offset': offset,
+            'length': length,
+            'stride': stride,
+            'capacity': capacity(length, stride, bits),
+        })
+
+    return index
+
+
+def plan_stripes(index: list[dict], size: int) -> list[tuple[dict, int, int]]:
+    """
+    plan_stripes: split message between carriers.
+
+    Args:
+        index (list[dict]): capacity index.
+        size (int): size of the message.
+
+    Returns:
+        list[tuple[dict, int, int]]: carrier, start and end of the message part.
+    """
+    stripes, start = [], 0
+
+    for carrier in sorted(index, key=lambda x: x['capacity'], reverse=True):
+        if start >= size and stripes:
+            break
+        if carrier['capacity'] == 0:
+            continue
+        end = min(start + carrier['capacity'], size)
+        stripes.append((carrier, start, end))
+        start = end
+
+    if start < size or not stripes:
+        raise ValueError(f'not enough capacity for {size} bytes')
+
+    return stripes
+
+
+def embed_stripe(filename: str, offset: int, length: int, stride: int, data: bytes, bits: int = 1) -> None:
+    """
+    embed_stripe: write header and payload of one stripe in the carrier in place.
+
+    Args:
+        filename (str): filename of the carrier.
+        offset (int): offset of the sample data.
+        length (int): length of the sample data.
+        stride (int): distance between used bytes.
+        data (bytes): header and payload.
+        bits (int, optional): how much bits will be changed. Defaults to 1.
+    """
+    msg_bits = ''.join([f'{x:08b}' for x in data])
+
+    with open(filename, 'r+b') as file, mmap.mmap(file.fileno(), 0) as pixels:
+        with memoryview(pixels)[offset:offset + length:stride] as samples:
+            embed_bits(samples, 0, msg_bits, bits)
+        pixels.flush()
+
+
+def embed_striped(message: bytes, index: list[dict], bits: int = 1, workers: int = None) -> int:
+    """
+    embed_striped: write message striped across carriers in place, in parallel.
+
+    Args:
+        message (bytes): source message.
+        index (list[dict]): capacity index.
+        bits (int, optional): how much bits will be changed. Defaults to 1.
+        workers (int, optional): process pool size. Defaults to number of cores.
+
+    Returns:
+        int: number of used carriers.
+    """
+    if not message:
+        raise ValueError('message is empty')
+
+    stripes = plan_stripes(index, len(message))
+    message_id = random.getrandbits(32)
+
+    jobs = [
+        (carrier['filename'], carrier['offset'], carrier['length'], carrier['stride'],
+         HEADER.pack(MAGIC, message_id, len(message), i, len(stripes), end - start) + message[start:end])
+        for i, (carrier, start, end) in enumerate(stripes)
+    ]
+
+    with ProcessPoolExecutor(workers) as executor:
+        list(executor.map(embed_stripe, *zip(*jobs), [bits] * len(jobs)))
+
+    return len(stripes)
+
+
+def read_stripe(filename: str, bits: int = 1) -> tuple[tuple, bytes]:
+    """
+    read_stripe: read header and payload of one stripe.
+
+    Args:
+        filename (str): filename of the carrier.
+        bits (int, optional): how much bits will be changed. Defaults to 1.
+
+    Returns:
+        tuple[tuple, bytes]: unpacked header and payload.
+    """
+    offset, length, stride = parse_carrier(filename)
+
+    if ceil(length / stride) * bits // 8 < HEADER.size:
+        raise ValueError(f'no stripe in {filename}')
+
+    with open(filename, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as pixels:
+        with memoryview(pixels)[offset:offset + length:stride] as samples:
+            # header and payload are one bit stream, the last byte of the header may hold payload bits too
+            header_bits = extract_bits(samples, 0, ceil(HEADER.size * 8 / bits) * bits, bits)[:HEADER.size * 8]
+            header = HEADER.unpack(int(header_bits, base=2).to_bytes(HEADER.size, 'big'))
+
+            if header[0] != MAGIC:
+                raise ValueError(f'no stripe in {filename}')
+            if header[-1] > capacity(length, stride, bits):
+                raise ValueError(f'stripe length {header[-1]} exceeds capacity of {filename}')
+
+            stripe_bits = extract_bits(samples, 0, (HEADER.size + header[-1]) * 8, bits)
+            payload = int(stripe_bits, base=2).to_bytes(HEADER.size + header[-1], 'big')[HEADER.size:]
+
+    return header, payload
+
+
+def extract_striped(filenames: list[str], bits: int = 1) -> bytes:
+    """
+    extract_striped: read message striped across carriers.
+
+    Args:
+        filenames (list[str]): filenames of the carriers.
+        bits (int, optional): how much bits will be changed. Defaults to 1.
+
+    Returns:
+        bytes: hidden message.
+    """
+    stripes = {}
+
+    for filename in filenames:
+        try:
+            header, payload = read_stripe(filename, bits)
+        except (ValueError, struct.error):
+            continue
+        stripes[header[1], header[3]] = (header, payload)
+
+    for message_id in dict.fromkeys(k[0] for k in stripes):
+        parts = sorted((k[1], v) for k, v in stripes.items() if k[0] == message_id)
+        _, _, message_len, _, stripe_count, _ = parts[0][1][0]
+
+        if [i for i, _ in parts] == list(range(stripe_count)):
+            break
+    else:
+        raise ValueError('no complete message found')
+
+    message = b''.join(payload for _, (_, payload) in parts)
+
+    if len(message) != message_len:
+        raise ValueError(f'message length is {len(message)}, header says {message_len}')
+
+    return message
+
+
+if __name__ == '__main__':
+    assert sys.argv[1] and sys.argv[2]
+
+    if sys.argv[1] == '-i':
+        sys.stdout.write(json.dumps(build_capacity_index(sys.argv[2]), indent=4) + '\n')
+    elif sys.argv[1] == '-w':
+        assert sys.argv[3]
+        used = embed_striped(sys.argv[3].encode('UTF-8'), build_capacity_index(sys.argv[2]))
+        sys.stdout.write(f'{used}\n')
+    elif sys.argv[1] == '-r':
+        filenames = [os.path.join(sys.argv[2], x) for x in sorted(os.listdir(sys.argv[2]))]
+        sys.stdout.write(f"{extract_striped(filenames).decode('UTF-8')}\n")
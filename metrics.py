@@ -0,0 +1,244 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metrics.py: Counters, timers and histograms for hot paths.
+
+Instrumentation is installed by enable() as wrappers around module functions
+and removed by disable(), so disabled metrics cost nothing.
+"""
+
+
+from contextlib import contextmanager
+from typing import Callable, Iterator
+from time import perf_counter
+from bisect import bisect_left
+import functools
+import threading
+import cProfile
+import pstats
+import ds_rsa
+import sdes
+import dsa
+import sys
+
+
+BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+
+COUNTERS: dict[str, float] = {}
+HISTOGRAMS: dict[str, list] = {}
+LOCK = threading.Lock()
+
+
+def bytes_increment(src, *args, **kwargs) -> int:
+    """
+    bytes_increment: increment of byte counters of HOT_PATHS, size of the first argument.
+
+    Args:
+        src: source buffer of the call.
+        *args: other arguments of the call.
+        **kwargs: keyword arguments of the call.
+
+    Returns:
+        int: size of src in bytes.
+    """
+    return memoryview(src).nbytes
+
+
+# (module, function, counter, histogram of seconds[, increment of counter from arguments])
+HOT_PATHS = (
+    (ds_rsa, 'fast_exp', 'ds_rsa_fast_exp_total', 'ds_rsa_fast_exp_seconds'),
+    (ds_rsa, 'sign_message', 'ds_rsa_sign_message_total', 'ds_rsa_sign_message_seconds'),
+    (ds_rsa, 'check_message_signature', 'ds_rsa_check_message_signature_total', 'ds_rsa_check_message_signature_seconds'),
+    (sdes, 'round_', 'sdes_round_total', None),
+    (sdes, 'encrypt', 'sdes_encrypt_total', None),
+    (sdes, 'decrypt', 'sdes_decrypt_total', None),
+    (sdes, 'encrypt_into', 'sdes_encrypt_bytes_total', None, bytes_increment),
+    (sdes, 'decrypt_into', 'sdes_decrypt_bytes_total', None, bytes_increment),
+    (dsa, 'sign_message', 'dsa_sign_message_total', 'dsa_sign_message_seconds'),
+    (dsa, 'sign_retry', 'dsa_sign_retry_total', 'dsa_sign_retry_seconds'),
+    (dsa, 'check_message_signature', 'dsa_check_message_signature_total', 'dsa_check_message_signature_seconds'),
+)
+
+ORIGINALS: dict[tuple[object, str], Callable] = {}
+
+
+def inc(name: str, value: float = 1) -> None:
+    """
+    inc: increase counter.
+
+    Args:
+        name (str): name of the counter.
+        value (float, optional): increment. Defaults to 1.
+    """
+    with LOCK:
+        COUNTERS[name] = COUNTERS.get(name, 0) + value
+
+
+def observe(name: str, value: float) -> None:
+    """
+    observe: add value to histogram.
+
+    Args:
+        name (str): name of the histogram.
+        value (float): observed value.
+    """
+    with LOCK:
+        histogram = HISTOGRAMS.setdefault(name, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+        histogram[0][bisect_left(BUCKETS, value)] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    """
+    timer: observe duration of the block in seconds.
+
+    Args:
+        name (str): name of the histogram.
+    """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, perf_counter() - start)
+
+
+def instrument(func: Callable, counter: str = None, histogram: str = None, size: Callable = None) -> Callable:
+    """
+    instrument: wrap function with counter and timer.
+
+    Args:
+        func (Callable): source function.
+        counter (str, optional): name of the counter of calls. Defaults to None.
+        histogram (str, optional): name of the histogram of durations. Defaults to None.
+        size (Callable, optional): increment of the counter from arguments of the call,
+                                   None to count calls. Defaults to None.
+
+    Returns:
+        Callable: wrapped function.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if counter is not None:
+            inc(counter, 1 if size is None else size(*args, **kwargs))
+        if histogram is None:
+            return func(*args, **kwargs)
+        with timer(histogram):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def enable() -> None:
+    """
+    enable: install instrumentation of the hot paths.
+    """
+    for module, name, *options in HOT_PATHS:
+        if (module, name) not in ORIGINALS:
+            ORIGINALS[module, name] = getattr(module, name)
+            setattr(module, name, instrument(ORIGINALS[module, name], *options))
+
+
+def disable() -> None:
+    """
+    disable: remove instrumentation of the hot paths.
+    """
+    for (module, name), func in ORIGINALS.items():
+        setattr(module, name, func)
+
+    ORIGINALS.clear()
+
+
+def reset() -> None:
+    """
+    reset: remove all collected values.
+    """
+    with LOCK:
+        COUNTERS.clear()
+        HISTOGRAMS.clear()
+
+
+def snapshot() -> dict[str, dict]:
+    """
+    snapshot: copy all collected values.
+
+    Returns:
+        dict[str, dict]: counters and histograms (buckets, sum, count).
+    """
+    with LOCK:
+        return {
+            'counters': dict(COUNTERS),
+            'histograms': {
+                name: {'buckets': list(buckets), 'sum': total, 'count': count}
+                for name, (buckets, total, count) in HISTOGRAMS.items()
+            },
+        }
+
+
+def to_prometheus(values: dict[str, dict] = None) -> str:
+    """
+    to_prometheus: format snapshot in Prometheus text exposition format.
+
+    Args:
+        values (dict[str, dict], optional): snapshot. Defaults to current values.
+
+    Returns:
+        str: Prometheus text.
+    """
+    values = values or snapshot()
+    lines = []
+
+    for name, value in sorted(values['counters'].items()):
+        lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name} {value}')
+
+    for name, histogram in sorted(values['histograms'].items()):
+        lines.append(f'# TYPE {name} histogram')
+        cumulative = 0
+        for le, count in zip(BUCKETS + ('+Inf',), histogram['buckets']):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum {histogram['sum']}")
+        lines.append(f"{name}_count {histogram['count']}")
+
+    return '\n'.join(lines) + '\n'
+
+
+@contextmanager
+def profile(filename: str = None, sort: str = 'cumulative', limit: int = 20) -> Iterator[cProfile.Profile]:
+    """
+    profile: profile the block with cProfile.
+
+    Args:
+        filename (str, optional): file for raw stats, otherwise stats are printed to stderr. Defaults to None.
+        sort (str, optional): sort key of printed stats. Defaults to 'cumulative'.
+        limit (int, optional): number of printed functions. Defaults to 20.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if filename is not None:
+            profiler.dump_stats(filename)
+        else:
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats(sort).print_stats(limit)
+
+
+if __name__ == '__main__':
+    assert sys.argv[1]
+
+    enable()
+
+    public_key, secret_key = ds_rsa.generate_keys()
+    ds_rsa.check_message_signature(*ds_rsa.sign_message(sys.argv[1], secret_key), public_key)
+
+    K1, K2 = sdes.generate_keys(sdes.KEY)
+    ''.join([sdes.encrypt(x, K1, K2) for x in sys.argv[1]])
+
+    secret_key, public_key = dsa.generate_keys()
+    dsa.check_message_signature(*dsa.sign_message(sys.argv[1], secret_key), public_key)
+
+    sys.stdout.write(to_prometheus())
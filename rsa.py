@@ -5,15 +5,25 @@ rsa.py: RSA algorithm.
 """
 
 
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterator
+from collections import deque
 from math import gcd as gcd
+from functools import lru_cache
+from bisect import bisect_left
+from math import ceil
 from primePy import primes
 from egcd import egcd
 import random
+import ast
 import sys
+import os
 
 
 PRIMES = [x for x in range(100, 199) if primes.check(x)]
 
+SMALL_E = (65537, 257, 17, 5, 3)
+
 
 def choose_random_primes(primes: list[int], epsilon: int = 10) -> tuple[int, int]:
     """
@@ -54,13 +64,84 @@ def choose_e(primes: list[int], x: int) -> int:
     return e
 
 
-def generate_keys() -> tuple[dict, dict]:
+@lru_cache(maxsize=16)
+def close_prime_pairs(primes: tuple[int, ...], epsilon: int) -> list[tuple[int, int]]:
+    """
+    close_prime_pairs: find all pairs of different primes closer than epsilon by index.
+
+    Args:
+        primes (tuple[int, ...]): primes.
+        epsilon (int): max difference between two prime numbers.
+
+    Returns:
+        list[tuple[int, int]]: pairs of primes.
+    """
+    primes = sorted(set(primes))
+    return [
+        (primes[i], primes[j])
+        for i in range(len(primes))
+        for j in range(i + 1, bisect_left(primes, primes[i] + epsilon))
+    ]
+
+
+def choose_close_primes(primes: list[int], epsilon: int = 10) -> tuple[int, int]:
+    """
+    choose_close_primes: choose two prime numbers in bounded time, without retries.
+
+    Args:
+        primes (list[int]): list of primes.
+        epsilon (int, optional): max difference between two prime numbers. Defaults to 10.
+
+    Returns:
+        tuple[int, int]: two prime numbers.
+    """
+    pairs = close_prime_pairs(tuple(primes), epsilon)
+
+    if not pairs:
+        raise ValueError(f'no primes closer than {epsilon}')
+
+    return random.choice(pairs)
+
+
+def choose_small_e(x: int) -> int:
+    """
+    choose_small_e: choose standard small e, otherwise the smallest odd e coprime with x.
+
+    Args:
+        x (int): x value.
+
+    Returns:
+        int: chosen e.
+    """
+    for e in SMALL_E:
+        if e < x and gcd(e, x) == 1:
+            return e
+
+    e = 3
+    while gcd(e, x) != 1:
+        e += 2
+
+    return e
+
+
+def generate_keys(fast: bool = False) -> tuple[dict, dict]:
     """
     generate_keys: generate public and secret keys.
 
+    Args:
+        fast (bool, optional): use bounded-time choose_close_primes and choose_small_e
+                               instead of random retries. Defaults to False.
+
     Returns:
         tuple[dict, dict]: pair public key and secret key.
     """
+    if fast:
+        p, q = choose_close_primes(PRIMES)
+        x = (p - 1) * (q - 1)
+        e = choose_small_e(x)
+        d = pow(e, -1, x)
+        return {'e': e, 'r': p * q}, {'d': d, 'r': p * q}
+
     p, q = choose_random_primes(PRIMES)
     r = p * q
 
@@ -114,6 +195,160 @@ def decrypt(text: str, secret_key: dict[str, int]) -> str:
     return decoded_text
 
 
+def choose_chunk_size(length: int, modulus: int, workers: int) -> int:
+    """
+    choose_chunk_size: choose number of symbols in one chunk of parallel processing.
+
+    Chunks are smaller for bigger modulus (cost of one symbol grows as square of
+    its bit length), but every worker gets at least one chunk.
+
+    Args:
+        length (int): number of symbols.
+        modulus (int): modulus r of the key.
+        workers (int): number of workers.
+
+    Returns:
+        int: chunk size.
+    """
+    target = max(256, (1 << 22) // modulus.bit_length() ** 2)
+    return max(1, min(target, ceil(length / workers)))
+
+
+def map_chunks(func: Callable[[str, dict[str, int]], str], chunks: Iterator[str], key: dict[str, int],
+               executor: Executor, window: int) -> Iterator[str]:
+    """
+    map_chunks: process chunks in executor keeping order and at most window chunks in flight.
+
+    Args:
+        func (Callable[[str, dict[str, int]], str]): encrypt or decrypt.
+        chunks (Iterator[str]): chunks of text.
+        key (dict[str, int]): key.
+        executor (Executor): executor.
+        window (int): max number of submitted chunks.
+
+    Yields:
+        Iterator[str]: processed chunks in order.
+    """
+    pending = deque()
+
+    for chunk in chunks:
+        pending.append(executor.submit(func, chunk, key))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def transform_parallel(func: Callable[[str, dict[str, int]], str], text: str, key: dict[str, int],
+                       workers: int = None, executor: Executor = None) -> str:
+    """
+    transform_parallel: encrypt or decrypt text by chunks on several cores.
+
+    Args:
+        func (Callable[[str, dict[str, int]], str]): encrypt or decrypt.
+        text (str): source text.
+        key (dict[str, int]): key.
+        workers (int, optional): number of processes. Defaults to number of cores.
+        executor (Executor, optional): executor to use instead of a new process pool. Defaults to None.
+
+    Returns:
+        str: processed text.
+    """
+    workers = workers or os.cpu_count()
+    size = choose_chunk_size(len(text), key['r'], workers)
+    chunks = (text[i:i + size] for i in range(0, len(text), size))
+
+    if executor is not None:
+        return ''.join(map_chunks(func, chunks, key, executor, 2 * workers))
+
+    with ProcessPoolExecutor(workers) as executor:
+        return ''.join(map_chunks(func, chunks, key, executor, 2 * workers))
+
+
+def encrypt_parallel(text: str, public_key: dict[str, int], workers: int = None, executor: Executor = None) -> str:
+    """
+    encrypt_parallel: encrypt text by public key on several cores.
+
+    Args:
+        text (str): source text.
+        public_key (dict[str, int]): public key.
+        workers (int, optional): number of processes. Defaults to number of cores.
+        executor (Executor, optional): executor to use instead of a new process pool. Defaults to None.
+
+    Returns:
+        str: encrypted text.
+    """
+    return transform_parallel(encrypt, text, public_key, workers, executor)
+
+
+def decrypt_parallel(text: str, secret_key: dict[str, int], workers: int = None, executor: Executor = None) -> str:
+    """
+    decrypt_parallel: decrypt text on several cores.
+
+    Args:
+        text (str): encrypted text.
+        secret_key (dict[str, int]): secret key.
+        workers (int, optional): number of processes. Defaults to number of cores.
+        executor (Executor, optional): executor to use instead of a new process pool. Defaults to None.
+
+    Returns:
+        str: decrypted text.
+    """
+    return transform_parallel(decrypt, text, secret_key, workers, executor)
+
+
+def transform_file_parallel(func: Callable[[str, dict[str, int]], str], filename: str, dfilename: str,
+                            key: dict[str, int], workers: int = None) -> None:
+    """
+    transform_file_parallel: encrypt or decrypt file by chunks on several cores.
+
+    The file is read and written incrementally.
+
+    Args:
+        func (Callable[[str, dict[str, int]], str]): encrypt or decrypt.
+        filename (str): filename of source file.
+        dfilename (str): filename of destination file.
+        key (dict[str, int]): key.
+        workers (int, optional): number of processes. Defaults to number of cores.
+    """
+    workers = workers or os.cpu_count()
+    size = choose_chunk_size(os.path.getsize(filename), key['r'], workers)
+
+    # newline='' keeps '\r\n' and '\r' of the text unchanged
+    with open(filename, newline='') as file, open(dfilename, 'w', newline='') as dfile, \
+            ProcessPoolExecutor(workers) as executor:
+        chunks = iter(lambda: file.read(size), '')
+        for chunk in map_chunks(func, chunks, key, executor, 2 * workers):
+            dfile.write(chunk)
+
+
+def encrypt_file_parallel(filename: str, efilename: str, public_key: dict[str, int], workers: int = None) -> None:
+    """
+    encrypt_file_parallel: encrypt file on several cores.
+
+    Args:
+        filename (str): filename of source file.
+        efilename (str): filename of destination file.
+        public_key (dict[str, int]): public key.
+        workers (int, optional): number of processes. Defaults to number of cores.
+    """
+    transform_file_parallel(encrypt, filename, efilename, public_key, workers)
+
+
+def decrypt_file_parallel(filename: str, dfilename: str, secret_key: dict[str, int], workers: int = None) -> None:
+    """
+    decrypt_file_parallel: decrypt file on several cores.
+
+    Args:
+        filename (str): filename of source file.
+        dfilename (str): filename of destination file.
+        secret_key (dict[str, int]): secret key.
+        workers (int, optional): number of processes. Defaults to number of cores.
+    """
+    transform_file_parallel(decrypt, filename, dfilename, secret_key, workers)
+
+
 def encrypt_file(filename: str, public_key: dict[str, int]) -> None:
     """
     encrypt_file: encrypt file.
@@ -152,10 +387,16 @@ if __name__ == '__main__':
 
     if sys.argv[1] == '-e':
         assert sys.argv[3]
-        encrypt_file(sys.argv[2], eval(sys.argv[3]))
+        encrypt_file(sys.argv[2], ast.literal_eval(sys.argv[3]))
     elif sys.argv[1] == '-d':
         assert sys.argv[3]
-        decrypt_file(sys.argv[2], eval(sys.argv[3]))
+        decrypt_file(sys.argv[2], ast.literal_eval(sys.argv[3]))
+    elif sys.argv[1] == '-ep':
+        assert sys.argv[3] and sys.argv[4]
+        encrypt_file_parallel(sys.argv[2], sys.argv[3], ast.literal_eval(sys.argv[4]))
+    elif sys.argv[1] == '-dp':
+        assert sys.argv[3] and sys.argv[4]
+        decrypt_file_parallel(sys.argv[2], sys.argv[3], ast.literal_eval(sys.argv[4]))
     elif sys.argv[1] == '-g' and sys.argv[2] == 'keys':
         public_key, secret_key = generate_keys()
         sys.stdout.write(f'pub: {public_key}\nsec: {secret_key}\n')
@@ -5,6 +5,7 @@ seds.py: S-DES algorithm.
 """
 
 
+from buffers import transform_into
 from typing import TypeVar
 from math import ceil
 import sys
@@ -19,6 +20,7 @@ IP1 = (2, 6, 3, 1, 4, 8, 5, 7)
 IP2 = (4, 1, 3, 5, 7, 2, 8, 6)
 S1 = [[1, 0, 3, 2], [3, 2, 1, 0], [0, 2, 1, 3], [3, 1, 3, 2]]
 S2 = [[0, 1, 2, 3], [2, 0, 1, 3], [3, 0, 1, 0], [2, 1, 0, 3]]
+TABLES = {}
 
 
 T = TypeVar('T')
@@ -249,6 +251,60 @@ def decrypt(symbol: str, K1: list[int], K2: list[int]) -> list[int]:
     return decoded_symbol
 
 
+def generate_tables(K1: list[int], K2: list[int]) -> tuple[bytes, bytes]:
+    """
+    generate_tables: precompute encryption and decryption of all bytes for bytes.translate.
+                     Tables are cached by keys.
+
+    Args:
+        K1 (list[int]): first 8-bit key.
+        K2 (list[int]): second 8-bit key.
+
+    Returns:
+        tuple[bytes, bytes]: encryption and decryption tables.
+    """
+    keys = (tuple(K1), tuple(K2))
+
+    if keys not in TABLES:
+        etable = bytes([ord(encrypt(chr(x), K1, K2)) for x in range(256)])
+        dtable = bytes([ord(decrypt(chr(x), K1, K2)) for x in range(256)])
+        TABLES[keys] = etable, dtable
+
+    return TABLES[keys]
+
+
+def encrypt_into(src, dst, K1: list[int], K2: list[int]) -> int:
+    """
+    encrypt_into: encrypt buffer into buffer (may be the same one).
+
+    Args:
+        src: readable buffer.
+        dst: writable buffer.
+        K1 (list[int]): first 8-bit key.
+        K2 (list[int]): second 8-bit key.
+
+    Returns:
+        int: number of encrypted bytes.
+    """
+    return transform_into(src, dst, generate_tables(K1, K2)[0])
+
+
+def decrypt_into(src, dst, K1: list[int], K2: list[int]) -> int:
+    """
+    decrypt_into: decrypt buffer into buffer (may be the same one).
+
+    Args:
+        src: readable buffer.
+        dst: writable buffer.
+        K1 (list[int]): first 8-bit key.
+        K2 (list[int]): second 8-bit key.
+
+    Returns:
+        int: number of decrypted bytes.
+    """
+    return transform_into(src, dst, generate_tables(K1, K2)[1])
+
+
 def encrypt_file(filename: str) -> None:
     """
     encrypt_file: encrypt file with name filename.
@@ -0,0 +1,497 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+service.py: Local signing and verification service with request micro-batching.
+
+Frames are length-prefixed (u32, big-endian). Fields are length-prefixed (u32)
+byte strings, integers are big-endian unsigned, messages are UTF-8.
+    request:  length | id (u32) | op (u8) | fields
+    response: length | id (u32) | status (u8) | fields
+
+    op 1, ds_rsa sign:  message, d, r        -> signature
+    op 2, ds_rsa check: message, signature, e, r -> 0 or 1
+    op 3, dsa sign:     message, key, q, p, g -> r, s
+    op 4, dsa check:    message, r, s, key, q, p, g -> 0 or 1
+
+Requests arriving within the batching window are sent to the process pool
+together. When max_pending requests are in flight the service stops reading
+from the sockets until some of them are done.
+"""
+
+
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import statistics
+import argparse
+import asyncio
+import struct
+import ds_rsa
+import dsa
+import sys
+
+
+DS_RSA_SIGN = 1
+DS_RSA_CHECK = 2
+DSA_SIGN = 3
+DSA_CHECK = 4
+
+OK = 0
+ERROR = 1
+
+MAX_FRAME = 1 << 24
+MAX_MODULUS_BITS = 4096
+
+DSA_PRIMES_Q = frozenset(dsa.PRIMES_Q)
+DSA_PRIMES_P = frozenset(dsa.PRIMES_P)
+
+FRAME = struct.Struct('>I')
+HEADER = struct.Struct('>IB')
+
+
+def to_bytes(number: int) -> bytes:
+    """
+    to_bytes: encode non-negative integer.
+
+    Args:
+        number (int): source number.
+
+    Returns:
+        bytes: big-endian bytes.
+    """
+    return number.to_bytes(max((number.bit_length() + 7) // 8, 1), 'big')
+
+
+def from_bytes(data: bytes) -> int:
+    """
+    from_bytes: decode non-negative integer.
+
+    Args:
+        data (bytes): big-endian bytes.
+
+    Returns:
+        int: number.
+    """
+    return int.from_bytes(data, 'big')
+
+
+def encode_frame(request_id: int, code: int, fields: list[bytes]) -> bytes:
+    """
+    encode_frame: encode request or response.
+
+    Args:
+        request_id (int): id of the request.
+        code (int): op of the request or status of the response.
+        fields (list[bytes]): fields.
+
+    Returns:
+        bytes: frame with length prefix.
+    """
+    body = HEADER.pack(request_id, code) + b''.join(FRAME.pack(len(x)) + x for x in fields)
+    return FRAME.pack(len(body)) + body
+
+
+def decode_frame(body: bytes) -> tuple[int, int, list[bytes]]:
+    """
+    decode_frame: decode request or response without length prefix.
+
+    Args:
+        body (bytes): frame body.
+
+    Returns:
+        tuple[int, int, list[bytes]]: id, op or status and fields.
+    """
+    request_id, code = HEADER.unpack_from(body)
+    fields, i = [], HEADER.size
+
+    while i < len(body):
+        length, = FRAME.unpack_from(body, i)
+        fields.append(body[i + FRAME.size:i + FRAME.size + length])
+        i += FRAME.size + length
+
+    if i != len(body):
+        raise ValueError('truncated field')
+
+    return request_id, code, fields
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """
+    read_frame: read frame body.
+
+    Args:
+        reader (asyncio.StreamReader): stream.
+
+    Returns:
+        bytes: frame body.
+    """
+    length, = FRAME.unpack(await reader.readexactly(FRAME.size))
+
+    if length > MAX_FRAME or length < HEADER.size:
+        raise ValueError(f'bad frame length {length}')
+
+    return await reader.readexactly(length)
+
+
+def check_ds_rsa_numbers(exponent: int, r: int, *numbers: int) -> None:
+    """
+    check_ds_rsa_numbers: reject keys and signatures which would make exponentiation too long.
+
+    Args:
+        exponent (int): d or e.
+        r (int): modulus.
+        *numbers (int): signature.
+    """
+    if not (1 < r and r.bit_length() <= MAX_MODULUS_BITS):
+        raise ValueError(f'modulus must have at most {MAX_MODULUS_BITS} bits')
+    if not 0 < exponent < r or any(not 0 <= x < r for x in numbers):
+        raise ValueError('exponent or signature is out of range')
+
+
+def check_dsa_numbers(q: int, p: int, g: int, key: int, *signature: int) -> None:
+    """
+    check_dsa_numbers: reject domain parameters and numbers out of dsa prime tables,
+                       dsa arithmetic is not reduced modulo and would not finish with them.
+
+    Args:
+        q (int): q.
+        p (int): p.
+        g (int): g.
+        key (int): secret or public key.
+        *signature (int): r and s.
+    """
+    if q not in DSA_PRIMES_Q or p not in DSA_PRIMES_P or (p - 1) % q != 0:
+        raise ValueError('q and p are not dsa domain parameters')
+    if not (1 < g < p and pow(g, q, p) == 1):
+        raise ValueError('g is not a generator of subgroup of order q')
+    if not 0 < key < p or any(not 0 <= x < q for x in signature):
+        raise ValueError('key or signature is out of range')
+
+
+def process_request(op: int, fields: list[bytes]) -> list[bytes]:
+    """
+    process_request: sign or check one request.
+
+    Args:
+        op (int): op of the request.
+        fields (list[bytes]): fields of the request.
+
+    Returns:
+        list[bytes]: fields of the response.
+    """
+    message, numbers = fields[0].decode('UTF-8'), [from_bytes(x) for x in fields[1:]]
+
+    if op == DS_RSA_SIGN:
+        d, r = numbers
+        check_ds_rsa_numbers(d, r)
+        return [to_bytes(ds_rsa.sign_message(message, {'d': d, 'r': r})[1])]
+    elif op == DS_RSA_CHECK:
+        signature, e, r = numbers
+        check_ds_rsa_numbers(e, r, signature)
+        return [to_bytes(ds_rsa.check_message_signature(message, signature, {'e': e, 'r': r}))]
+    elif op == DSA_SIGN:
+        key, q, p, g = numbers
+        check_dsa_numbers(q, p, g, key)
+        dsa.Q, dsa.P, dsa.G = q, p, g
+        return [to_bytes(x) for x in dsa.sign_message(message, key)[1:]]
+    elif op == DSA_CHECK:
+        r, s, key, q, p, g = numbers
+        check_dsa_numbers(q, p, g, key, r, s)
+        dsa.Q, dsa.P, dsa.G = q, p, g
+        return [to_bytes(dsa.check_message_signature(message, r, s, key))]
+
+    raise ValueError(f'unknown op {op}')
+
+
+def process_batch(batch: list[tuple[int, list[bytes]]]) -> list[tuple[int, list[bytes]]]:
+    """
+    process_batch: process requests in a worker process.
+
+    Args:
+        batch (list[tuple[int, list[bytes]]]): ops and fields of the requests.
+
+    Returns:
+        list[tuple[int, list[bytes]]]: statuses and fields of the responses.
+    """
+    results = []
+
+    for op, fields in batch:
+        try:
+            results.append((OK, process_request(op, fields)))
+        except (ValueError, IndexError, UnicodeDecodeError, ZeroDivisionError) as error:
+            results.append((ERROR, [str(error).encode('UTF-8')]))
+
+    return results
+
+
+class SignatureService:
+    """
+    SignatureService: asyncio server which batches requests for a process pool.
+    """
+
+    def __init__(self, window: float = 0.002, max_batch: int = 256, max_pending: int = 4096, workers: int = None):
+        """
+        __init__: create service.
+
+        Args:
+            window (float, optional): batching window in seconds. Defaults to 0.002.
+            max_batch (int, optional): max requests in one batch. Defaults to 256.
+            max_pending (int, optional): max requests in flight. Defaults to 4096.
+            workers (int, optional): process pool size. Defaults to number of cores.
+        """
+        self.window = window
+        self.max_batch = max_batch
+        self.slots = asyncio.Semaphore(max_pending)
+        self.executor = ProcessPoolExecutor(workers)
+        self.batch = []
+        self.timer = None
+
+    def flush(self) -> None:
+        """
+        flush: send collected requests to the process pool.
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        if not self.batch:
+            return
+
+        batch, self.batch = self.batch, []
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(self.executor, process_batch, [x[:2] for x in batch])
+
+        def done(task: asyncio.Future) -> None:
+            if task.exception() is not None:
+                results = [(ERROR, [str(task.exception()).encode('UTF-8')])] * len(batch)
+            else:
+                results = task.result()
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+        task.add_done_callback(done)
+
+    async def submit(self, op: int, fields: list[bytes]) -> tuple[int, list[bytes]]:
+        """
+        submit: add request to the current batch and wait for the response.
+
+        Args:
+            op (int): op of the request.
+            fields (list[bytes]): fields of the request.
+
+        Returns:
+            tuple[int, list[bytes]]: status and fields of the response.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.batch.append((op, fields, future))
+
+        if len(self.batch) >= self.max_batch:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush)
+
+        return await future
+
+    async def respond(self, writer: asyncio.StreamWriter, request_id: int, op: int, fields: list[bytes]) -> None:
+        """
+        respond: process request and write response.
+
+        Args:
+            writer (asyncio.StreamWriter): stream.
+            request_id (int): id of the request.
+            op (int): op of the request.
+            fields (list[bytes]): fields of the request.
+        """
+        try:
+            status, result = await self.submit(op, fields)
+            writer.write(encode_frame(request_id, status, result))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.slots.release()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        handle: read requests of the connection.
+
+        Args:
+            reader (asyncio.StreamReader): stream.
+            writer (asyncio.StreamWriter): stream.
+        """
+        tasks = set()
+
+        try:
+            while True:
+                await self.slots.acquire()
+                try:
+                    request_id, op, fields = decode_frame(await read_frame(reader))
+                except BaseException:
+                    self.slots.release()
+                    raise
+                task = asyncio.create_task(self.respond(writer, request_id, op, fields))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, struct.error):
+            pass
+        finally:
+            if tasks:
+                await asyncio.wait(tasks)
+            writer.close()
+
+    async def serve(self, unix: str = None, host: str = '127.0.0.1', port: int = 7878) -> None:
+        """
+        serve: accept connections forever.
+
+        Args:
+            unix (str, optional): path of Unix socket, otherwise TCP is used. Defaults to None.
+            host (str, optional): TCP host. Defaults to '127.0.0.1'.
+            port (int, optional): TCP port. Defaults to 7878.
+        """
+        if unix is not None:
+            server = await asyncio.start_unix_server(self.handle, unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+
+        async with server:
+            await server.serve_forever()
+
+
+async def connect(unix: str = None, host: str = '127.0.0.1', port: int = 7878) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    connect: connect to the service.
+
+    Args:
+        unix (str, optional): path of Unix socket, otherwise TCP is used. Defaults to None.
+        host (str, optional): TCP host. Defaults to '127.0.0.1'.
+        port (int, optional): TCP port. Defaults to 7878.
+
+    Returns:
+        tuple[asyncio.StreamReader, asyncio.StreamWriter]: streams.
+    """
+    if unix is not None:
+        return await asyncio.open_unix_connection(unix)
+
+    return await asyncio.open_connection(host, port)
+
+
+async def call(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, op: int, fields: list[bytes],
+               request_id: int = 0) -> tuple[int, list[bytes]]:
+    """
+    call: send request and wait for its response.
+
+    Args:
+        reader (asyncio.StreamReader): stream.
+        writer (asyncio.StreamWriter): stream.
+        op (int): op of the request.
+        fields (list[bytes]): fields of the request.
+        request_id (int, optional): id of the request. Defaults to 0.
+
+    Returns:
+        tuple[int, list[bytes]]: status and fields of the response.
+    """
+    writer.write(encode_frame(request_id, op, fields))
+    await writer.drain()
+    response_id, status, result = decode_frame(await read_frame(reader))
+    assert response_id == request_id
+    return status, result
+
+
+async def load(requests: int = 10000, concurrency: int = 64, op: int = DS_RSA_CHECK, **address) -> dict[str, float]:
+    """
+    load: generate load with concurrent connections.
+
+    Args:
+        requests (int, optional): total number of requests. Defaults to 10000.
+        concurrency (int, optional): number of connections. Defaults to 64.
+        op (int, optional): op of the requests. Defaults to DS_RSA_CHECK.
+        **address: arguments of connect.
+
+    Returns:
+        dict[str, float]: throughput and latency percentiles (ms).
+    """
+    message = 'load generator message'
+
+    if op in (DS_RSA_SIGN, DS_RSA_CHECK):
+        public_key, secret_key = ds_rsa.generate_keys()
+        _, signature = ds_rsa.sign_message(message, secret_key)
+        numbers = [secret_key['d'], secret_key['r']] if op == DS_RSA_SIGN else [signature, public_key['e'], public_key['r']]
+    else:
+        secret_key, public_key = dsa.generate_keys()
+        _, r, s = dsa.sign_message(message, secret_key)
+        numbers = [secret_key] if op == DSA_SIGN else [r, s, public_key]
+        numbers += [dsa.Q, dsa.P, dsa.G]
+
+    fields = [message.encode('UTF-8')] + [to_bytes(x) for x in numbers]
+    latencies, errors = [], 0
+
+    async def worker(count: int) -> None:
+        nonlocal errors
+        reader, writer = await connect(**address)
+        for i in range(count):
+            start = perf_counter()
+            status, _ = await call(reader, writer, op, fields, i)
+            latencies.append(perf_counter() - start)
+            errors += status != OK
+        writer.close()
+
+    start = perf_counter()
+    await asyncio.gather(*[worker(requests // concurrency + (i < requests % concurrency)) for i in range(concurrency)])
+    elapsed = perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': quantiles[49] * 1e3,
+        'p99_ms': quantiles[98] * 1e3,
+    }
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    """
+    parse_args: parse command line.
+
+    Args:
+        argv (list[str], optional): arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('command', choices=('serve', 'load'))
+    parser.add_argument('--unix', help='path of Unix socket')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7878)
+    parser.add_argument('--window', type=float, default=2.0, help='batching window in ms')
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-pending', type=int, default=4096)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('-n', '--requests', type=int, default=10000)
+    parser.add_argument('-c', '--concurrency', type=int, default=64)
+    parser.add_argument('--op', type=int, default=DS_RSA_CHECK, choices=(DS_RSA_SIGN, DS_RSA_CHECK, DSA_SIGN, DSA_CHECK))
+    return parser.parse_args(argv)
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    main: run service or load generator.
+
+    Args:
+        args (argparse.Namespace): parsed arguments.
+    """
+    address = {'unix': args.unix, 'host': args.host, 'port': args.port}
+
+    if args.command == 'serve':
+        service = SignatureService(args.window / 1e3, args.max_batch, args.max_pending, args.workers)
+        await service.serve(**address)
+    else:
+        stats = await load(args.requests, args.concurrency, args.op, **address)
+        sys.stdout.write(''.join(f'{k}: {v:.2f}\n' if isinstance(v, float) else f'{k}: {v}\n' for k, v in stats.items()))
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
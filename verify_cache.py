@@ -0,0 +1,180 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+verify_cache.py: Cache of successful ds_rsa and dsa signature checks.
+
+Entries are keyed by (public key fingerprint, message digest, signature) and
+evicted by LRU order, age (ttl) and total size. Failed checks are never cached.
+"""
+
+
+from collections import OrderedDict
+from typing import Callable
+import threading
+import hashlib
+import ds_rsa
+import time
+import dsa
+import sys
+
+
+ENTRY_OVERHEAD = 200
+
+
+class VerificationCache:
+    """
+    VerificationCache: thread-safe LRU/TTL cache of successful signature checks.
+    """
+
+    def __init__(self, maxsize: int = 65536, ttl: float = None, max_bytes: int = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        __init__: create empty cache.
+
+        Args:
+            maxsize (int, optional): max number of entries. Defaults to 65536.
+            ttl (float, optional): lifetime of entry in seconds, None for unlimited. Defaults to None.
+            max_bytes (int, optional): max estimated size of entries, None for unlimited. Defaults to None.
+            clock (Callable[[], float], optional): time source. Defaults to time.monotonic.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(*numbers: int) -> bytes:
+        """
+        fingerprint: calculate fingerprint of the public key.
+
+        Args:
+            *numbers (int): numbers of the key.
+
+        Returns:
+            bytes: fingerprint.
+        """
+        return hashlib.sha256(repr(numbers).encode('UTF-8')).digest()[:16]
+
+    def lookup(self, key: tuple) -> bool:
+        """
+        lookup: find successful check and mark it as recently used.
+
+        Args:
+            key (tuple): fingerprint, message digest and signature.
+
+        Returns:
+            bool: True if the check is cached.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is not None and (self.ttl is None or entry[0] > self.clock()):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True
+
+            if entry is not None:
+                self.size -= self.entries.pop(key)[1]
+
+            self.misses += 1
+            return False
+
+    def store(self, key: tuple) -> None:
+        """
+        store: add successful check and evict old entries.
+
+        Args:
+            key (tuple): fingerprint, message digest and signature.
+        """
+        size = ENTRY_OVERHEAD + sum(sys.getsizeof(x) for x in key)
+        expires = None if self.ttl is None else self.clock() + self.ttl
+
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+
+            self.entries[key] = (expires, size)
+            self.size += size
+
+            while len(self.entries) > self.maxsize or (self.max_bytes is not None and self.size > self.max_bytes):
+                self.size -= self.entries.popitem(last=False)[1][1]
+
+    def check_ds_rsa(self, message: str, signature: int, public_key: dict[str, int]) -> bool:
+        """
+        check_ds_rsa: cached ds_rsa.check_message_signature.
+
+        Args:
+            message (str): source message.
+            signature (int): signature.
+            public_key (dict[str, int]): public key.
+
+        Returns:
+            bool: True or False.
+        """
+        key = (
+            self.fingerprint(public_key['e'], public_key['r']),
+            hashlib.sha256(message.encode('UTF-8')).digest(),
+            signature,
+        )
+
+        if self.lookup(key):
+            return True
+
+        result = ds_rsa.check_message_signature(message, signature, public_key)
+
+        if result:
+            self.store(key)
+
+        return result
+
+    def check_dsa(self, message: str, r: int, s: int, public_key: int) -> bool:
+        """
+        check_dsa: cached dsa.check_message_signature with current dsa.Q, dsa.P and dsa.G.
+
+        Args:
+            message (str): source message.
+            r (int): r.
+            s (int): s.
+            public_key (int): public key.
+
+        Returns:
+            bool: True or False.
+        """
+        key = (
+            self.fingerprint(public_key, dsa.Q, dsa.P, dsa.G),
+            hashlib.sha256(message.encode('UTF-8')).digest(),
+            (r, s),
+        )
+
+        if self.lookup(key):
+            return True
+
+        result = dsa.check_message_signature(message, r, s, public_key)
+
+        if result:
+            self.store(key)
+
+        return result
+
+    def clear(self) -> None:
+        """
+        clear: remove all entries and reset counters.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.size = self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        stats: counters of the cache.
+
+        Returns:
+            dict[str, int]: hits, misses, number of entries and their estimated size.
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries), 'bytes': self.size}
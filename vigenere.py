@@ -0,0 +1,179 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+vigenere.py: Polyalphabetic (Vigenere) extension of caesar algorithm.
+Formulas:
+    1) Ek(i) = (i+k[j mod m]) mod n.
+    2) Dk(i) = (i+n-k[j mod m]) mod n.
+where j is position of the symbol and m is length of the key.
+
+Byte buffers are processed with NumPy: the buffer is viewed as rows of a few
+KiB (a multiple of m) and the key tiled to one row is broadcast over the rows,
+so the keystream is never materialized for the whole buffer.
+"""
+
+
+from typing import Iterator
+import numpy as np
+
+
+ROW = 4096
+
+
+def encrypt(text: str, key: str, n: int = 256) -> str:
+    """
+    encrypt: Vigenere encryption algorithm for ASCII codes.
+    """
+    m = len(key)
+    return ''.join([chr((ord(x) + ord(key[i % m])) % n) for i, x in enumerate(text)])
+
+
+def decrypt(text: str, key: str, n: int = 256) -> str:
+    """
+    decrypt: Vigenere decryption algorithm for ASCII codes.
+    """
+    m = len(key)
+    return ''.join([chr((ord(x) + n - ord(key[i % m])) % n) for i, x in enumerate(text)])
+
+
+def shift_into(src, dst, shifts: np.ndarray, phase: int = 0, n: int = 256) -> int:
+    """
+    shift_into: write (x + shifts[j mod m]) mod n for every byte x of src into dst.
+
+    Args:
+        src: readable buffer.
+        dst: writable buffer of at least the same size, may be src itself.
+        shifts (np.ndarray): uint8 shifts, already reduced mod n.
+        phase (int, optional): position of the key for the first byte. Defaults to 0.
+        n (int, optional): alphabet size, not more than 256. Defaults to 256.
+
+    Returns:
+        int: position of the key for the byte after src (phase of the next chunk).
+    """
+    assert n <= 256
+
+    source = np.frombuffer(memoryview(src).cast('B'), dtype=np.uint8)
+    destination = np.frombuffer(memoryview(dst).cast('B'), dtype=np.uint8)[:len(source)]
+
+    m = len(shifts)
+    shifts = np.tile(np.roll(shifts, -(phase % m)), -(-ROW // m))
+    full = len(source) // len(shifts) * len(shifts)
+    rest = len(source) - full
+
+    if n == 256:
+        np.add(source[:full].reshape(-1, len(shifts)), shifts, out=destination[:full].reshape(-1, len(shifts)))
+        np.add(source[full:], shifts[:rest], out=destination[full:])
+    else:
+        rows = source[:full].reshape(-1, len(shifts)).astype(np.uint16)
+        rows += shifts
+        np.remainder(rows, n, out=destination[:full].reshape(-1, len(shifts)), casting='unsafe')
+        np.remainder(source[full:].astype(np.uint16) + shifts[:rest], n, out=destination[full:], casting='unsafe')
+
+    return (phase + len(source)) % m
+
+
+def key_shifts(key: bytes, n: int = 256, decryption: bool = False) -> np.ndarray:
+    """
+    key_shifts: transform key to shifts of encryption or decryption.
+
+    Args:
+        key (bytes): key.
+        n (int, optional): alphabet size. Defaults to 256.
+        decryption (bool, optional): shifts for decryption. Defaults to False.
+
+    Returns:
+        np.ndarray: uint8 shifts.
+    """
+    assert len(key) > 0
+
+    shifts = np.frombuffer(bytes(key), dtype=np.uint8).astype(np.uint16) % n
+
+    if decryption:
+        shifts = (n - shifts) % n
+
+    return shifts.astype(np.uint8)
+
+
+def encrypt_into(src, dst, key: bytes, phase: int = 0, n: int = 256) -> int:
+    """
+    encrypt_into: Vigenere encryption of buffer into buffer (may be the same one).
+
+    Args:
+        src: readable buffer.
+        dst: writable buffer.
+        key (bytes): key.
+        phase (int, optional): position of the key for the first byte. Defaults to 0.
+        n (int, optional): alphabet size, not more than 256. Defaults to 256.
+
+    Returns:
+        int: phase of the next chunk.
+    """
+    return shift_into(src, dst, key_shifts(key, n), phase, n)
+
+
+def decrypt_into(src, dst, key: bytes, phase: int = 0, n: int = 256) -> int:
+    """
+    decrypt_into: Vigenere decryption of buffer into buffer (may be the same one).
+
+    Args:
+        src: readable buffer.
+        dst: writable buffer.
+        key (bytes): key.
+        phase (int, optional): position of the key for the first byte. Defaults to 0.
+        n (int, optional): alphabet size, not more than 256. Defaults to 256.
+
+    Returns:
+        int: phase of the next chunk.
+    """
+    return shift_into(src, dst, key_shifts(key, n, True), phase, n)
+
+
+def encrypt_stream(chunks: Iterator[bytes], key: bytes, n: int = 256) -> Iterator[bytes]:
+    """
+    encrypt_stream: Vigenere encryption of stream keeping key phase between chunks.
+
+    Args:
+        chunks (Iterator[bytes]): chunks of the stream.
+        key (bytes): key.
+        n (int, optional): alphabet size, not more than 256. Defaults to 256.
+
+    Yields:
+        Iterator[bytes]: encrypted chunks.
+    """
+    shifts, phase = key_shifts(key, n), 0
+
+    for chunk in chunks:
+        result = bytearray(len(chunk))
+        phase = shift_into(chunk, result, shifts, phase, n)
+        yield bytes(result)
+
+
+def decrypt_stream(chunks: Iterator[bytes], key: bytes, n: int = 256) -> Iterator[bytes]:
+    """
+    decrypt_stream: Vigenere decryption of stream keeping key phase between chunks.
+
+    Args:
+        chunks (Iterator[bytes]): chunks of the stream.
+        key (bytes): key.
+        n (int, optional): alphabet size, not more than 256. Defaults to 256.
+
+    Yields:
+        Iterator[bytes]: decrypted chunks.
+    """
+    shifts, phase = key_shifts(key, n, True), 0
+
+    for chunk in chunks:
+        result = bytearray(len(chunk))
+        phase = shift_into(chunk, result, shifts, phase, n)
+        yield bytes(result)
+
+
+if __name__ == '__main__':
+    assert encrypt('cryptography', 'key', 128) == 'NWr[YhRWZ[Mr'
+    assert decrypt(encrypt('cryptography', 'key'), 'key') == 'cryptography'
+    assert encrypt('cryptography', '\x03') == 'fu|swrjudsk|'
+
+    buffer = bytearray(b'cryptography')
+    encrypt_into(buffer, buffer, b'key')
+    assert buffer == encrypt('cryptography', 'key').encode('latin-1')
+    assert b''.join(decrypt_stream([buffer[:5], buffer[5:]], b'key')) == b'cryptography'